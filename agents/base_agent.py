@@ -2,23 +2,25 @@
 Base Agent class for the multi-agent system
 """
 
-from abc import ABC, abstractmethod
-from typing import Any, Dict
-from settings.settings import Settings
+from typing import Any, Dict, Protocol, runtime_checkable
+from settings.settings import get_settings
 
 
-class BaseAgent(ABC):
-    """Base class for all agents in the system"""
+@runtime_checkable
+class Agent(Protocol):
+    """Interface every agent in the system implements; checked by type checkers, not at call time"""
     
-    def __init__(self):
-        self.settings = Settings()
-    
-    @abstractmethod
-    async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def process(self, input_data: Dict[str, Any]) -> Any:
         """Process input data and return results"""
-        pass
+        ...
     
-    @abstractmethod
     def get_agent_type(self) -> str:
         """Return the type/name of the agent"""
-        pass
\ No newline at end of file
+        ...
+
+
+class BaseAgent:
+    """Mixin giving agents the shared settings"""
+    
+    def __init__(self):
+        self.settings = get_settings()
@@ -0,0 +1,174 @@
+"""
+Batching Decision Agent - Coalesces concurrent decision requests into one LLM call
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import orjson
+
+from agents.decision_agent import DecisionAgent, _DECISION_SCHEMA
+from agents.gemini_client import get_model
+
+logger = logging.getLogger(__name__)
+
+# One decision per task, tagged with the task's index so order mistakes cannot misroute answers
+_BATCH_DECISION_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"index": {"type": "integer"}, **_DECISION_SCHEMA["properties"]},
+        "required": ["index", *_DECISION_SCHEMA["required"]]
+    }
+}
+
+_BATCH_JSON_OUTPUT_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": _BATCH_DECISION_SCHEMA
+}
+
+_BATCH_DECISION_PROMPT = """Analyze each of the following tasks against its own policy documentation and return a JSON array with exactly one decision per task, each carrying that task's index.
+
+{tasks}
+
+Requirements:
+1. Judge every task independently, using only its own POLICY CONTEXT
+2. Citations MUST only reference tags from that task's AVAILABLE TAGS list
+3. Use "approve" only if the task fully complies with policies and has sufficient citations
+4. Use "reject" for non-compliance, insufficient information, or inadequate context
+5. Rationale must cite specific tags and explain why approved/rejected
+6. Required actions should be specific and actionable for rejected tasks
+7. For insufficient information, explain what's missing in the rationale"""
+
+_BATCH_TASK_BLOCK = """=== TASK {index} ===
+TASK:
+{task}
+
+POLICY CONTEXT:
+{context}
+
+AVAILABLE TAGS:
+{tags}"""
+
+
+class BatchingDecisionAgent(DecisionAgent):
+    """DecisionAgent that merges requests arriving within a short window into one multi-task LLM call"""
+
+    def __init__(self, max_batch: Optional[int] = None, window_ms: Optional[float] = None):
+        super().__init__()
+        self.max_batch = max_batch or self.settings.DECISION_BATCH_MAX
+        self.window_seconds = (window_ms if window_ms is not None else self.settings.DECISION_BATCH_WINDOW_MS) / 1000
+        self._batch_model = get_model(
+            self.settings.LLM_MODEL, temperature=0.1, max_output_tokens=1000 * self.max_batch
+        )
+        # Queue and collector are bound to the event loop that created them
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        # Strong references so in-flight batch tasks are not garbage collected
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue the request for the next batch and wait for its decision"""
+        try:
+            rejected = self._precheck(input_data)
+            if rejected is not None:
+                return rejected
+
+            future = asyncio.get_running_loop().create_future()
+            self._ensure_collector().put_nowait((input_data, future))
+            return await future
+
+        except Exception as e:
+            logger.error(f"Error in BatchingDecisionAgent.process: {e}")
+            return self._create_reject_response()
+
+    def _ensure_collector(self) -> asyncio.Queue:
+        """Start the batch collector for the running loop if it is not already running"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._collector is None or self._collector.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._collector = loop.create_task(self._collect_batches(self._queue))
+        return self._queue
+
+    async def _collect_batches(self, queue: asyncio.Queue) -> None:
+        """Drain up to max_batch requests or one window, whichever comes first, and dispatch them"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Dispatch without waiting, so new requests can start the next batch while this one is in flight
+            task = loop.create_task(self._run_batch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Resolve every future in the batch, falling back to single calls if the batched call fails"""
+        try:
+            if len(batch) == 1:
+                input_data, _ = batch[0]
+                results = [await self._decide_single(input_data)]
+            else:
+                results = await self._decide_batch([input_data for input_data, _ in batch])
+        except Exception as e:
+            logger.error(f"Batched decision call failed for {len(batch)} tasks, retrying individually: {e}")
+            results = await asyncio.gather(*(self._decide_single(input_data) for input_data, _ in batch))
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _decide_single(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Make one decision with the regular single-task prompt"""
+        try:
+            tags = input_data["tags"]
+            decision_json = await self._generate_decision(input_data["details"], input_data["passages"], tags)
+            return self._parse_decision(decision_json, tags)
+        except Exception as e:
+            logger.error(f"Error in BatchingDecisionAgent single decision: {e}")
+            return self._create_reject_response()
+
+    async def _decide_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Make decisions for several tasks with one LLM call"""
+        prompt = _BATCH_DECISION_PROMPT.format(tasks="\n\n".join(
+            _BATCH_TASK_BLOCK.format(
+                index=index,
+                task=input_data["details"],
+                context=self._build_context(input_data["passages"]),
+                tags=json.dumps(input_data["tags"])
+            )
+            for index, input_data in enumerate(inputs)
+        ))
+
+        response = await asyncio.to_thread(
+            self._batch_model.generate_content, prompt, generation_config=_BATCH_JSON_OUTPUT_CONFIG
+        )
+        decisions = orjson.loads(response.text.strip())
+
+        # Tasks the model skipped or mis-indexed get the standard reject
+        by_index = {item.get("index"): item for item in decisions if isinstance(item, dict)}
+        results = []
+        for index, input_data in enumerate(inputs):
+            decision_data = by_index.get(index)
+            if decision_data is None:
+                logger.error(f"Batched decision missing task {index}")
+                results.append(self._create_reject_response())
+            else:
+                results.append(self._validate_and_filter_decision(decision_data, input_data["tags"]))
+        return results
+
+    def get_agent_type(self) -> str:
+        """Return the agent type"""
+        return "BatchingDecisionAgent"
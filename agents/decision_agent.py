@@ -2,140 +2,193 @@
 Decision Agent - Makes approval/rejection decisions using gemini-1.5-flash-2.0
 """
 
+import asyncio
 import json
 import logging
 from typing import Any, Dict, List, Optional
 
-import google.generativeai as genai
+import orjson
 
 from agents.base_agent import BaseAgent
+from agents.gemini_client import get_model, warm_generative_client
 
 logger = logging.getLogger(__name__)
 
+# Structured output schema so Gemini always returns parseable decision JSON
+_DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "decision": {"type": "string", "enum": ["approve", "reject"]},
+        "rationale": {"type": "string"},
+        "citations": {"type": "array", "items": {"type": "string"}},
+        "confidence": {"type": "number"},
+        "required_actions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "action": {"type": "string"},
+                    "description": {"type": "string"}
+                }
+            }
+        }
+    },
+    "required": ["decision", "rationale", "citations", "confidence"]
+}
+
+# Field and enum checks derived from the schema once, instead of rebuilt on every parse
+_REQUIRED_FIELDS = tuple(_DECISION_SCHEMA["required"])
+_VALID_DECISIONS = frozenset(_DECISION_SCHEMA["properties"]["decision"]["enum"])
+
+# Per-call overrides merged into the shared model's sampling config
+_JSON_OUTPUT_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": _DECISION_SCHEMA
+}
+
+_DECISION_PROMPT = """Analyze the following task against the provided policy documentation and return a JSON decision.
+
+TASK:
+{task}
+
+POLICY CONTEXT:
+{context}
+
+AVAILABLE TAGS:
+{tags}
+
+Requirements:
+1. Citations MUST only reference tags from the AVAILABLE TAGS list above
+2. Use "approve" only if task fully complies with policies and has sufficient citations
+3. Use "reject" for non-compliance, insufficient information, or inadequate context
+4. Rationale must cite specific tags and explain why approved/rejected
+5. Required actions should be specific and actionable for rejected tasks
+6. For insufficient information, explain what's missing in the rationale"""
+
 
 class DecisionAgent(BaseAgent):
     """Agent responsible for making task approval/rejection decisions"""
     
-    def __init__(self):
+    def __init__(self, model: Optional[Any] = None):
         super().__init__()
-        self._setup_gemini()
-        
-    def _setup_gemini(self):
-        """Configure Gemini API"""
-        genai.configure(api_key=self.settings.GEMINI_API_KEY)
+        # Any object with generate_content(prompt, generation_config=...) returning .text; tests pass a fake
+        self._model = model or get_model(self.settings.LLM_MODEL, temperature=0.1, max_output_tokens=1000)
+        self._warmed = False
+    
+    async def warm(self) -> None:
+        """Build the Gemini client off the event loop so the first decision call skips that setup"""
+        if self._warmed:
+            return
+        try:
+            await asyncio.to_thread(warm_generative_client)
+            self._warmed = True
+        except Exception as e:
+            logger.warning(f"DecisionAgent warmup failed: {e}")
     
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process decision request using gemini-1.5-flash-2.0 with JSON output"""
         try:
-            task_details = input_data.get("details", "")
-            passages = input_data.get("passages", [])
-            tags = input_data.get("tags", [])
-            coverage = input_data.get("coverage", 0.0)
-            
-            if not task_details:
-                raise ValueError("details is required")
-            
-            if not passages or not tags:
-                logger.warning("No passages or tags provided")
-                return self._create_reject_response()
+            rejected = self._precheck(input_data)
+            if rejected is not None:
+                return rejected
             
             # Generate LLM decision
-            decision_json = await self._generate_decision(task_details, passages, tags)
-            
-            # Parse and validate JSON
-            try:
-                # Clean the response - remove markdown code blocks if present
-                cleaned_json = decision_json.strip()
-                if cleaned_json.startswith('```json'):
-                    cleaned_json = cleaned_json[7:]  # Remove ```json
-                if cleaned_json.endswith('```'):
-                    cleaned_json = cleaned_json[:-3]  # Remove ```
-                cleaned_json = cleaned_json.strip()
-                
-                decision_data = json.loads(cleaned_json)
-                return self._validate_and_filter_decision(decision_data, tags)
-            except json.JSONDecodeError as e:
-                logger.error(f"Invalid JSON from LLM: {e}")
-                logger.error(f"Raw LLM response: {decision_json}")
-                return self._create_reject_response()
+            tags = input_data["tags"]
+            decision_json = await self._generate_decision(input_data["details"], input_data["passages"], tags)
+            return self._parse_decision(decision_json, tags)
                 
         except Exception as e:
             logger.error(f"Error in DecisionAgent.process: {e}")
             return self._create_reject_response()
     
+    def _precheck(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return a reject response for inputs that never need the LLM, or None to proceed"""
+        task_details = input_data.get("details", "")
+        passages = input_data.get("passages", [])
+        tags = input_data.get("tags", [])
+        coverage = input_data.get("coverage", 0.0)
+        
+        if not task_details:
+            raise ValueError("details is required")
+        
+        if not passages or not tags:
+            logger.warning("No passages or tags provided")
+            return self._create_reject_response()
+        
+        # Guaranteed rejects never reach the LLM
+        if (coverage < self.settings.COVERAGE_THRESHOLD
+                or len(passages) < self.settings.MIN_PASSAGES
+                or len(task_details.strip()) < self.settings.MIN_DETAILS_LEN):
+            logger.info("Short-circuit reject: coverage=%s, passages=%d", coverage, len(passages))
+            return self._create_reject_response()
+        
+        return None
+    
+    def _parse_decision(self, decision_json: str, tags: List[str]) -> Dict[str, Any]:
+        """Parse and validate JSON (JSON mode guarantees no markdown fences)"""
+        try:
+            decision_data = orjson.loads(decision_json)
+            return self._validate_and_filter_decision(decision_data, tags)
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Invalid JSON from LLM: {e}")
+            logger.error(f"Raw LLM response: {decision_json}")
+            return self._create_reject_response()
+    
     async def _generate_decision(self, task_details: str, passages: List[str], tags: List[str]) -> str:
         """Generate decision using gemini-1.5-flash-2.0"""
         try:
-            # Truncate context to max chars
-            total_context = "\n\n".join(passages)
-            if len(total_context) > self.settings.MAX_CONTEXT_CHARS:
-                total_context = total_context[:self.settings.MAX_CONTEXT_CHARS]
-            
-            prompt = f"""Analyze the following task against the provided policy documentation and return a JSON decision.
-
-TASK:
-{task_details}
-
-POLICY CONTEXT:
-{total_context}
-
-AVAILABLE TAGS:
-{json.dumps(tags)}
-
-Return ONLY a valid JSON object with this exact structure:
-{{
-  "decision": "approve|reject",
-  "rationale": "Evidence-based rationale citing specific tags and explaining the decision",
-  "citations": ["tag1", "tag2", ...],
-  "confidence": 0.0-1.0,
-  "required_actions": [
-    {{"action": "action_name", "description": "what needs to be done"}},
-    ...
-  ]
-}}
-
-Requirements:
-1. Citations MUST only reference tags from the AVAILABLE TAGS list above
-2. Use "approve" only if task fully complies with policies and has sufficient citations
-3. Use "reject" for non-compliance, insufficient information, or inadequate context
-4. Rationale must cite specific tags and explain why approved/rejected
-5. Required actions should be specific and actionable for rejected tasks
-6. For insufficient information, explain what's missing in the rationale"""
-
-            model = genai.GenerativeModel(
-                model_name=self.settings.LLM_MODEL,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.1,
-                    max_output_tokens=1000
-                )
+            prompt = _DECISION_PROMPT.format(
+                task=task_details,
+                context=self._build_context(passages),
+                tags=json.dumps(tags)
             )
             
-            response = model.generate_content(prompt)
+            # Run the blocking SDK call in a worker thread so the event loop keeps serving requests
+            response = await asyncio.to_thread(
+                self._model.generate_content, prompt, generation_config=_JSON_OUTPUT_CONFIG
+            )
             return response.text.strip()
             
         except Exception as e:
             logger.error(f"Error generating decision with LLM: {e}")
             raise
     
+    def _build_context(self, passages: List[str]) -> str:
+        """Join passages up to MAX_CONTEXT_CHARS without materializing the full join"""
+        limit = self.settings.MAX_CONTEXT_CHARS
+        parts = []
+        total_len = 0
+        for passage in passages:
+            piece = f"\n\n{passage}" if parts else passage
+            if total_len + len(piece) >= limit:
+                parts.append(piece[:limit - total_len])
+                break
+            parts.append(piece)
+            total_len += len(piece)
+        return "".join(parts)
+    
     def _validate_and_filter_decision(self, decision_data: Dict[str, Any], available_tags: List[str]) -> Dict[str, Any]:
         """Validate decision JSON and filter citations to subset of available tags"""
         try:
             # Validate required fields
-            required_fields = ["decision", "rationale", "citations", "confidence"]
-            for field in required_fields:
+            for field in _REQUIRED_FIELDS:
                 if field not in decision_data:
                     logger.error(f"Missing required field: {field}")
                     return self._create_reject_response()
             
             # Validate decision value
-            valid_decisions = ["approve", "reject"]
-            if decision_data["decision"] not in valid_decisions:
+            if decision_data["decision"] not in _VALID_DECISIONS:
                 logger.error(f"Invalid decision: {decision_data['decision']}")
                 return self._create_reject_response()
             
-            # Filter citations to be subset of available tags
+            # Filter citations to a deduplicated, order-preserving subset of available tags
+            available_set = frozenset(available_tags)
             citations = decision_data.get("citations", [])
-            filtered_citations = [tag for tag in citations if tag in available_tags]
+            seen = set()
+            filtered_citations = [
+                tag for tag in citations
+                if tag in available_set and not (tag in seen or seen.add(tag))
+            ]
             
             # Validate confidence
             confidence = decision_data.get("confidence", 0.0)
@@ -0,0 +1,36 @@
+"""
+In-process LRU + TTL cache for query embeddings
+"""
+
+import hashlib
+from typing import Optional, Sequence
+
+from agents.ttl_cache import TTLCache
+from settings.settings import get_settings
+
+
+class EmbeddingCache(TTLCache[Sequence[float]]):
+    """Thread-safe LRU cache with per-entry expiry for embedding vectors"""
+
+    def __init__(self, max_size: int = 2000, ttl_seconds: float = 600):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def make_key(model: str, dim: int, text: str, task_type: str = "RETRIEVAL_QUERY") -> str:
+        """Build a cache key that is unique per model, dimensionality, task type and text"""
+        # blake2b at 16 bytes is faster than sha256 and still collision-safe for a cache key
+        return hashlib.blake2b(f"{model}|{dim}|{task_type}|{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide embedding cache singleton, sized from settings on first use"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        settings = get_settings()
+        _embedding_cache = EmbeddingCache(
+            max_size=settings.EMBEDDING_CACHE_SIZE, ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS
+        )
+    return _embedding_cache
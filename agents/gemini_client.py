@@ -0,0 +1,35 @@
+"""
+Process-wide Gemini client setup shared by the agents
+"""
+
+from functools import lru_cache
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+
+from settings.settings import get_settings
+
+
+@lru_cache
+def configure_gemini() -> None:
+    """Configure the Gemini SDK once per process"""
+    genai.configure(api_key=get_settings().GEMINI_API_KEY)
+
+
+@lru_cache
+def get_model(model_name: str, temperature: float = 0.1, max_output_tokens: int = 1000) -> genai.GenerativeModel:
+    """Get a cached GenerativeModel for the given model and sampling settings"""
+    configure_gemini()
+    return genai.GenerativeModel(
+        model_name=model_name,
+        generation_config=genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_output_tokens
+        )
+    )
+
+
+def warm_generative_client() -> None:
+    """Build the SDK's shared generative service client ahead of the first generate call"""
+    configure_gemini()
+    genai_client.get_default_generative_client()
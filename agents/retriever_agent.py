@@ -2,22 +2,102 @@
 Retriever Agent - Handles semantic retrieval from pgvector database
 """
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
 import google.generativeai as genai
-import psycopg2
-from sqlalchemy import text as sql_text
-from sqlalchemy.sql import text
+import numpy as np
+from pgvector.utils import HalfVector
+from sqlalchemy import TextClause, text as sql_text
 
 from agents.base_agent import BaseAgent
-from database.connection import get_database_session, engine
+from agents.embedding_cache import EmbeddingCache, get_embedding_cache
+from agents.gemini_client import configure_gemini
+from agents.semantic_cache import get_semantic_cache
+from database.connection import get_async_database_session, warm_async_pool
 from schemas.review import RetrievalReport
 
 
 logger = logging.getLogger(__name__)
 
+# Passages are trimmed in SQL so full chunk text never crosses the wire
+MAX_PASSAGE_CHARS = 1500
+
+# Built once per process so SQLAlchemy reuses its compiled form.
+# The query vector is bound once; ordering by the distance alias still uses the HNSW index.
+_RETRIEVE_CHUNKS_SQL = sql_text("""
+    SELECT id, document_id, left(text, :max_chars) as text, (1 - distance) as similarity
+    FROM (
+        SELECT id, document_id, text, (embedding <=> CAST(:embedding AS halfvec)) as distance
+        FROM chunks 
+        WHERE model = :model AND dim = :dim
+        ORDER BY distance
+        LIMIT :top_k
+    ) nearest
+""")
+
+# One round trip for many probe vectors: Top-K per query via a lateral join
+_RETRIEVE_CHUNKS_BATCH_SQL = sql_text("""
+    SELECT q.qid, c.id, c.document_id, left(c.text, :max_chars) as text, (1 - c.distance) as similarity
+    FROM unnest(CAST(:qids AS int[]), CAST(:qvecs AS halfvec[])) AS q(qid, embedding)
+    CROSS JOIN LATERAL (
+        SELECT id, document_id, text, (chunks.embedding <=> q.embedding) as distance
+        FROM chunks
+        WHERE model = :model AND dim = :dim
+        ORDER BY chunks.embedding <=> q.embedding
+        LIMIT :top_k
+    ) c
+    ORDER BY q.qid, c.distance
+""")
+
+# Quantized variants: walk the 1-bit HNSW graph (EMBEDDING_DIM / 8 bytes per vector) for rerank_k candidates,
+# then order those by exact halfvec cosine distance so returned similarities are unchanged.
+# The bit width must match the idx_chunks_embedding_bq expression for the index to be used.
+@lru_cache
+def _quantized_retrieve_sql(bits: int) -> Tuple[TextClause, TextClause]:
+    """Single and batched quantized retrieval statements for this embedding width, built once per width"""
+    single = sql_text(f"""
+        SELECT id, document_id, left(text, :max_chars) as text, (1 - distance) as similarity
+        FROM (
+            SELECT id, document_id, text, (embedding <=> CAST(:embedding AS halfvec)) as distance
+            FROM (
+                SELECT id, document_id, text, embedding
+                FROM chunks
+                WHERE model = :model AND dim = :dim
+                ORDER BY binary_quantize(embedding)::bit({bits}) <~> binary_quantize(CAST(:embedding AS halfvec))
+                LIMIT :rerank_k
+            ) candidates
+            ORDER BY distance
+            LIMIT :top_k
+        ) nearest
+    """)
+    batch = sql_text(f"""
+        SELECT q.qid, c.id, c.document_id, left(c.text, :max_chars) as text, (1 - c.distance) as similarity
+        FROM unnest(CAST(:qids AS int[]), CAST(:qvecs AS halfvec[])) AS q(qid, embedding)
+        CROSS JOIN LATERAL (
+            SELECT id, document_id, text, (candidates.embedding <=> q.embedding) as distance
+            FROM (
+                SELECT id, document_id, text, embedding
+                FROM chunks
+                WHERE model = :model AND dim = :dim
+                ORDER BY binary_quantize(chunks.embedding)::bit({bits}) <~> binary_quantize(q.embedding)
+                LIMIT :rerank_k
+            ) candidates
+            ORDER BY distance
+            LIMIT :top_k
+        ) c
+        ORDER BY q.qid, c.distance
+    """)
+    return single, batch
+
+
+def _empty_report() -> RetrievalReport:
+    """Report returned when retrieval finds nothing or fails"""
+    return RetrievalReport.model_construct(passages=[], tags=[], doc_ids=[], coverage=0.0)
+
 
 class RetrieverAgent(BaseAgent):
     """Agent responsible for retrieving relevant documents via pgvector"""
@@ -25,18 +105,32 @@ class RetrieverAgent(BaseAgent):
     def __init__(self):
         super().__init__()
         self._setup_gemini()
+        self.embedding_cache = get_embedding_cache()
+        self.semantic_cache = get_semantic_cache()
+        if self.settings.QUANTIZED_SEARCH:
+            self._retrieve_sql, self._retrieve_batch_sql = _quantized_retrieve_sql(self.settings.EMBEDDING_DIM)
+        else:
+            self._retrieve_sql = _RETRIEVE_CHUNKS_SQL
+            self._retrieve_batch_sql = _RETRIEVE_CHUNKS_BATCH_SQL
         
     def _setup_gemini(self):
         """Configure Gemini API"""
         try:
-            genai.configure(api_key=self.settings.GEMINI_API_KEY)
+            configure_gemini()
             logger.info("RetrieverAgent initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize RetrieverAgent: {e}")
             raise
     
-    def _get_embedding(self, text: str) -> List[float]:
-        """Generate embedding using Gemini"""
+    def _get_embedding(self, text: str) -> np.ndarray:
+        """Generate a float32 embedding using Gemini, reusing cached vectors for repeated queries"""
+        cache_key = EmbeddingCache.make_key(
+            self.settings.EMBEDDING_MODEL, self.settings.EMBEDDING_DIM, text, "RETRIEVAL_QUERY"
+        )
+        cached = self.embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             result = genai.embed_content(
                 model=self.settings.EMBEDDING_MODEL,
@@ -44,11 +138,30 @@ class RetrieverAgent(BaseAgent):
                 task_type="RETRIEVAL_QUERY",
                 output_dimensionality=self.settings.EMBEDDING_DIM
             )
-            return result['embedding']
+            embedding = np.asarray(result['embedding'], dtype=np.float32)
+            self.embedding_cache.put(cache_key, embedding)
+            return embedding
         except Exception as e:
             logger.error(f"Failed to generate embedding: {e}")
             raise
     
+    async def warmup(self) -> None:
+        """Open the DB pool and the Gemini connection before the first request"""
+        try:
+            await warm_async_pool()
+        except Exception as e:
+            logger.warning(f"Database pool warmup failed: {e}")
+        
+        try:
+            await asyncio.wait_for(
+                asyncio.to_thread(self._get_embedding, "warmup"),
+                timeout=self.settings.WARMUP_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Embedding warmup timed out after {self.settings.WARMUP_TIMEOUT_SECONDS}s")
+        except Exception as e:
+            logger.warning(f"Embedding warmup failed: {e}")
+    
     async def process(self, input_data: Dict[str, Any]) -> RetrievalReport:
         """Process retrieval request and return relevant documents from pgvector"""
         try:
@@ -56,93 +169,148 @@ class RetrieverAgent(BaseAgent):
             if not task_details:
                 raise ValueError("task details are required")
             
-            # Generate query embedding
-            query_embedding = self._get_embedding(task_details)
+            # Generate query embedding off the event loop
+            query_embedding = await asyncio.to_thread(self._get_embedding, task_details)
             
-            # Query pgvector with Top-K=4 using raw psycopg2 connection
+            # Reuse results of a near-identical earlier query
+            cached_report = self.semantic_cache.lookup(query_embedding)
+            if cached_report is not None:
+                return cached_report
+            
+            # Query pgvector with Top-K on the asyncpg pool, so the event loop stays free
             try:
-                # Get raw connection from SQLAlchemy engine
-                raw_conn = engine.raw_connection()
-                cursor = raw_conn.cursor()
-                
-                # Format embedding as proper pgvector array
-                embedding_array = query_embedding
-                
-                # Execute query with proper psycopg2 parameter substitution
-                query_sql = """
-                    SELECT id, document_id, text, 
-                           (1 - (embedding <=> %s::vector)) as similarity
-                    FROM chunks 
-                    WHERE model = %s AND dim = %s
-                    ORDER BY embedding <=> %s::vector
-                    LIMIT %s
-                """
-                
-                cursor.execute(query_sql, (
-                    embedding_array,
-                    self.settings.EMBEDDING_MODEL,
-                    self.settings.EMBEDDING_DIM,
-                    embedding_array,
-                    self.settings.TOP_K
-                ))
-                
-                results = cursor.fetchall()
-                cursor.close()
-                raw_conn.close()
+                async with get_async_database_session() as db:
+                    result = await db.execute(
+                        self._retrieve_sql,
+                        {
+                            # Sent in binary by the pgvector codec registered on the pool
+                            "embedding": np.asarray(query_embedding, dtype=np.float32),
+                            "model": self.settings.EMBEDDING_MODEL,
+                            "dim": self.settings.EMBEDDING_DIM,
+                            "top_k": self.settings.TOP_K,
+                            "rerank_k": self.settings.TOP_K * self.settings.QUANTIZED_RERANK_FACTOR,
+                            "max_chars": MAX_PASSAGE_CHARS
+                        }
+                    )
+                    results = result.fetchall()
                 
             except Exception as query_error:
                 logger.error(f"Query execution failed: {query_error}")
                 results = []
             
-            # Process results
-            passages = []
-            tags = []
-            doc_ids = []
-            similarities = []
-            
-            for row in results:
-                try:
-                    chunk_id, document_id, text, similarity = row
-                    
-                    # Trim passage to max 1500 chars
-                    trimmed_text = text[:1500] if len(text) > 1500 else text
-                    passages.append(trimmed_text)
-                    
-                    # Create tag
-                    tag = f"doc:{document_id}#chunk:{chunk_id}"
-                    tags.append(tag)
-                    
-                    # Track doc IDs and similarities
-                    if document_id not in doc_ids:
-                        doc_ids.append(document_id)
-                    similarities.append(float(similarity))
-                except Exception as row_error:
-                    logger.error(f"Error processing row {row}: {row_error}")
-                    continue
-            
-            # Calculate coverage as mean similarity
-            coverage = sum(similarities) / len(similarities) if similarities else 0.0
-            
-            # Validate lengths
-            if len(passages) != len(tags):
-                logger.error(f"Length mismatch: passages={len(passages)}, tags={len(tags)}")
-                raise ValueError("Passages and tags length mismatch")
-            
-            return RetrievalReport(
-                passages=passages,
-                tags=tags,
-                doc_ids=doc_ids,
-                coverage=round(coverage, 3)
-            )
+            report = self._build_report(results)
+            if report.passages:
+                self.semantic_cache.add(query_embedding, report)
+            return report
             
         except Exception as e:
             logger.error(f"Error in RetrieverAgent.process: {e}")
-            return RetrievalReport(
-                passages=[],
-                tags=[],
-                doc_ids=[],
-                coverage=0.0
+            return _empty_report()
+    
+    async def batch_process(self, inputs: List[Dict[str, Any]]) -> List[RetrievalReport]:
+        """Retrieve for several tasks with one embedding call and one SQL round trip"""
+        reports: List[Optional[RetrievalReport]] = [None] * len(inputs)
+        try:
+            pending = [i for i, item in enumerate(inputs) if item.get("details")]
+            embeddings = await asyncio.to_thread(
+                self._get_embeddings_batch, [inputs[i]["details"] for i in pending]
             )
+            
+            # Serve near-identical queries from the semantic cache, probe the rest together
+            probes: Dict[int, np.ndarray] = {}
+            for i, embedding in zip(pending, embeddings):
+                cached_report = self.semantic_cache.lookup(embedding)
+                if cached_report is not None:
+                    reports[i] = cached_report
+                else:
+                    probes[i] = embedding
+            
+            if probes:
+                rows_by_input: Dict[int, List[Any]] = {i: [] for i in probes}
+                try:
+                    async with get_async_database_session() as db:
+                        result = await db.execute(
+                            self._retrieve_batch_sql,
+                            {
+                                "qids": list(probes),
+                                # Wrapped so asyncpg encodes each as a halfvec element, not a nested array
+                                "qvecs": [HalfVector(np.asarray(v, dtype=np.float32)) for v in probes.values()],
+                                "model": self.settings.EMBEDDING_MODEL,
+                                "dim": self.settings.EMBEDDING_DIM,
+                                "top_k": self.settings.TOP_K,
+                                "rerank_k": self.settings.TOP_K * self.settings.QUANTIZED_RERANK_FACTOR,
+                                "max_chars": MAX_PASSAGE_CHARS
+                            }
+                        )
+                        results = result.fetchall()
+                    for qid, *row in results:
+                        rows_by_input[qid].append(row)
+                except Exception as query_error:
+                    logger.error(f"Batch query execution failed: {query_error}")
+                
+                for i, rows in rows_by_input.items():
+                    reports[i] = self._build_report(rows)
+                    if reports[i].passages:
+                        self.semantic_cache.add(probes[i], reports[i])
+                        
+        except Exception as e:
+            logger.error(f"Error in RetrieverAgent.batch_process: {e}")
+        
+        return [
+            report if report is not None else _empty_report()
+            for report in reports
+        ]
+    
+    def _get_embeddings_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed several texts in one Gemini call, skipping those already cached"""
+        keys = [
+            EmbeddingCache.make_key(self.settings.EMBEDDING_MODEL, self.settings.EMBEDDING_DIM, text, "RETRIEVAL_QUERY")
+            for text in texts
+        ]
+        embeddings = [self.embedding_cache.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        if missing:
+            try:
+                result = genai.embed_content(
+                    model=self.settings.EMBEDDING_MODEL,
+                    content=[texts[i] for i in missing],
+                    task_type="RETRIEVAL_QUERY",
+                    output_dimensionality=self.settings.EMBEDDING_DIM
+                )
+            except Exception as e:
+                logger.error(f"Failed to generate batch embeddings: {e}")
+                raise
+            for i, values in zip(missing, result['embedding']):
+                embedding = np.asarray(values, dtype=np.float32)
+                self.embedding_cache.put(keys[i], embedding)
+                embeddings[i] = embedding
+                
+        return embeddings
+    
+    def _build_report(self, results: List[Any]) -> RetrievalReport:
+        """Turn (chunk_id, document_id, text, similarity) rows into a RetrievalReport"""
+        chunk_ids, doc_id_col, texts, sims = zip(*results) if results else ((), (), (), ())
+        
+        # Trim passages to max 1500 chars (already done in SQL) and tag each with its source chunk
+        passages = [text if len(text) <= MAX_PASSAGE_CHARS else text[:MAX_PASSAGE_CHARS] for text in texts]
+        tags = [f"doc:{document_id}#chunk:{chunk_id}" for document_id, chunk_id in zip(doc_id_col, chunk_ids)]
+        
+        # Ordered unique doc IDs
+        doc_ids = list(dict.fromkeys(doc_id_col))
+        
+        # Calculate coverage as mean similarity, clamped to the schema's [0, 1] range
+        sims_arr = np.fromiter(sims, dtype=np.float64, count=len(sims))
+        coverage = float(sims_arr.mean()) if sims_arr.size else 0.0
+        coverage = min(max(coverage, 0.0), 1.0)
+        
+        # Fields are built here from typed SQL rows, so skip Pydantic validation on the request path
+        return RetrievalReport.model_construct(
+            passages=passages,
+            tags=tags,
+            doc_ids=doc_ids,
+            coverage=round(coverage, 3)
+        )
     
     def get_agent_type(self) -> str:
         """Return the agent type"""
@@ -0,0 +1,170 @@
+"""
+Semantic query cache using random-projection LSH over query embeddings
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from schemas.review import RetrievalReport
+from settings.settings import get_settings
+
+
+class SemanticCache:
+    """Reuse retrieval results for paraphrased queries whose embeddings are near-identical"""
+
+    def __init__(
+        self,
+        dim: int = 768,
+        num_tables: int = 8,
+        bits_per_table: int = 16,
+        threshold: float = 0.95,
+        max_candidates: int = 32,
+        max_entries: int = 1000,
+        ttl_seconds: float = 600,
+        seed: int = 0
+    ):
+        self.dim = dim
+        self.num_tables = num_tables
+        self.bits_per_table = bits_per_table
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # Fixed projection matrix so signatures are stable for the process lifetime
+        rng = np.random.default_rng(seed)
+        self._projection = rng.standard_normal((dim, bits_per_table * num_tables)).astype(np.float32)
+
+        # Normalized vectors live in one contiguous matrix so candidate scoring is a gather + matvec
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+
+        self._tables: List[Dict[bytes, List[int]]] = [{} for _ in range(num_tables)]
+        self._entries: "OrderedDict[int, Tuple[float, int, List[bytes], RetrievalReport]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def _normalize(self, embedding: Sequence[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if vector.shape != (self.dim,) or norm == 0.0:
+            return None
+        return vector / norm
+
+    def _signatures(self, vector: np.ndarray) -> List[bytes]:
+        bits = (vector @ self._projection) > 0
+        packed = np.packbits(bits.reshape(self.num_tables, self.bits_per_table), axis=1)
+        return [row.tobytes() for row in packed]
+
+    def _evict(self, entry_id: int) -> None:
+        _, slot, signatures, _ = self._entries.pop(entry_id)
+        self._free_slots.append(slot)
+        for table, signature in zip(self._tables, signatures):
+            bucket = table.get(signature)
+            if bucket is None:
+                continue
+            bucket.remove(entry_id)
+            if not bucket:
+                del table[signature]
+
+    def lookup(self, embedding: Sequence[float]) -> Optional[RetrievalReport]:
+        """Return a cached report whose query cosine similarity is >= threshold"""
+        vector = self._normalize(embedding)
+        if vector is None:
+            return None
+
+        with self._lock:
+            now = time.monotonic()
+            candidate_ids: List[int] = []
+            seen = set()
+            for table, signature in zip(self._tables, self._signatures(vector)):
+                for entry_id in table.get(signature, ()):
+                    if entry_id in seen:
+                        continue
+                    seen.add(entry_id)
+                    if self._entries[entry_id][0] < now:
+                        continue
+                    candidate_ids.append(entry_id)
+                    if len(candidate_ids) >= self.max_candidates:
+                        break
+                if len(candidate_ids) >= self.max_candidates:
+                    break
+
+            if not candidate_ids:
+                self.misses += 1
+                return None
+
+            slots = [self._entries[entry_id][1] for entry_id in candidate_ids]
+            scores = self._vectors[slots] @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            entry_id = candidate_ids[best]
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return self._entries[entry_id][3]
+
+    def add(self, embedding: Sequence[float], report: RetrievalReport) -> None:
+        """Index a retrieval report under its query embedding"""
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+
+        with self._lock:
+            while len(self._entries) >= self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+            signatures = self._signatures(vector)
+            slot = self._free_slots.pop()
+            self._vectors[slot] = vector
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (time.monotonic() + self.ttl_seconds, slot, signatures, report)
+            for table, signature in zip(self._tables, signatures):
+                table.setdefault(signature, []).append(entry_id)
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._tables = [{} for _ in range(self.num_tables)]
+            self._entries.clear()
+            self._free_slots = list(range(self.max_entries - 1, -1, -1))
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the metrics endpoint"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get the process-wide semantic cache singleton, configured from settings on first use"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        settings = get_settings()
+        _semantic_cache = SemanticCache(
+            dim=settings.EMBEDDING_DIM,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            max_entries=settings.SEMANTIC_CACHE_SIZE,
+            ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS
+        )
+    return _semantic_cache
@@ -5,7 +5,7 @@ Database models for document storage with pgvector
 from sqlalchemy import Column, Integer, String, Text, DateTime, Float
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC
 import uuid
 
 from database.connection import Base
@@ -27,8 +27,8 @@ class DocumentEmbedding(Base):
     content = Column(Text, nullable=False)
     content_hash = Column(String(64), nullable=False, unique=True, index=True)
     
-    # Vector embedding (768 dimensions for Google's embedding models)
-    embedding = Column(Vector(768), nullable=False)
+    # Vector embedding (768 dimensions for Google's embedding models), stored as float16 like chunks.embedding
+    embedding = Column(HALFVEC(768), nullable=False)
     
     # Metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
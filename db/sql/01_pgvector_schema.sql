@@ -15,7 +15,7 @@ CREATE TABLE chunks (
     title TEXT,
     section TEXT,
     text TEXT NOT NULL,
-    embedding vector(768),
+    embedding halfvec(768),  -- float16 storage: half the bytes per distance computation
     model TEXT,
     dim INTEGER,
     task_type TEXT,
@@ -23,9 +23,9 @@ CREATE TABLE chunks (
     ingested_at TIMESTAMPTZ DEFAULT NOW()
 );
 
--- Create ANN index for cosine similarity
-CREATE INDEX IF NOT EXISTS idx_chunks_embedding_cos 
-ON chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+-- Create HNSW ANN index for cosine similarity; sized for an empty corpus, ingestion retunes it by chunk count
+CREATE INDEX IF NOT EXISTS idx_chunks_embedding_hnsw 
+ON chunks USING hnsw (embedding halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
 
 -- Create additional indexes for common queries
 CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON chunks (document_id);
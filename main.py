@@ -1,10 +1,32 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from database.connection import dispose_async_engine
+from rag.orchestrator import RAGOrchestrator
 from routes import api_router
+from settings.log_config import configure_logging
+from settings.settings import get_settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener = configure_logging()
+    # Build agents once per process instead of per request
+    app.state.orchestrator = RAGOrchestrator()
+    if get_settings().WARMUP_ON_STARTUP:
+        await app.state.orchestrator.warmup()
+    yield
+    await dispose_async_engine()
+    log_listener.stop()
+
 
 app = FastAPI(
     title="Automated Task Review Agent",
     description="pgvector-based RAG system for task review and approval",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 app.include_router(api_router)
\ No newline at end of file
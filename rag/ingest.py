@@ -4,164 +4,355 @@ Run with: python -m rag.ingest or make ingest
 """
 
 import os
+import io
 import hashlib
 import logging
+import multiprocessing
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any
-from datetime import datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 import google.generativeai as genai
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
-from sqlalchemy import text
+from pgvector.utils import HalfVector
+from sqlalchemy import column, insert, table, text
 from sqlalchemy.orm import Session
 
-from database.connection import get_database_session
+from database.connection import (
+    configure_hnsw_params, drop_vector_index, ensure_chunk_indexes, ensure_halfvec_embedding, get_database_session
+)
 from settings.settings import get_settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_CHUNK_COLUMNS = (
+    "document_id", "page_start", "page_end", "title", "section", "text",
+    "embedding", "model", "dim", "task_type", "sha256", "ingested_at"
+)
+
+# Lightweight table clause so small batches go out as one multi-row INSERT
+_CHUNKS_TABLE = table("chunks", *(column(name) for name in _CHUNK_COLUMNS))
+
+# Statements are built once per process so SQLAlchemy's compiled cache is hit on every batch
+_INSERT_CHUNKS_SQL = insert(_CHUNKS_TABLE)
+
+_EXISTING_HASHES_SQL = text("SELECT sha256 FROM chunks WHERE sha256 = ANY(:hashes)")
+
+_COPY_CHUNKS_SQL = f"COPY chunks ({', '.join(_CHUNK_COLUMNS)}) FROM STDIN WITH (FORMAT binary)"
+
+# Binary COPY framing: signature, flags and header extension length, per-row field count, end marker
+_COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_COPY_FIELD_COUNT = struct.pack(">h", len(_CHUNK_COLUMNS))
+_COPY_BINARY_TRAILER = struct.pack(">h", -1)
+_COPY_NULL = struct.pack(">i", -1)
+_PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+# Below this many rows a multi-row INSERT is cheaper than setting up COPY
+COPY_MIN_ROWS = 100
+
+
+def load_single_pdf(pdf_file: Path) -> List[Document]:
+    """Load one PDF with page metadata; module-level so worker processes can run it"""
+    try:
+        logger.info(f"Loading {pdf_file.name}...")
+        loader = PyPDFLoader(str(pdf_file))
+        docs = loader.load()
+        
+        # Add metadata
+        for i, doc in enumerate(docs):
+            doc.metadata.update({
+                "source": pdf_file.name,
+                "document_id": pdf_file.stem,
+                "page": i + 1,
+                "page_start": i + 1,
+                "page_end": i + 1,
+            })
+        
+        logger.info(f"Loaded {len(docs)} pages from {pdf_file.name}")
+        return docs
+        
+    except Exception as e:
+        logger.warning(f"Failed to load {pdf_file.name}: {e}")
+        return []
+
+
+def compute_sha256(text: str) -> str:
+    """Compute SHA256 hash of text content"""
+    # OpenSSL-backed hashlib already uses SHA-NI where available; ~1us per 900-char chunk
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def stable_document_id(name: str) -> int:
+    """Map a document name to a stable INTEGER id that is the same on every run"""
+    # Built-in hash() is salted per interpreter, so it gave a new id on each ingest
+    return zlib.crc32(name.encode("utf-8")) % 2147483647
+
+
+def select_new_chunks(db: Session, chunks: List[Document], hashes: List[str]) -> List[Tuple[Document, str]]:
+    """Drop chunks already stored or repeated in this run, using one lookup for all hashes"""
+    seen = {row[0] for row in db.execute(_EXISTING_HASHES_SQL, {"hashes": list(set(hashes))})}
+    
+    pending = []
+    for chunk, content_hash in zip(chunks, hashes):
+        if content_hash in seen:
+            continue
+        seen.add(content_hash)
+        pending.append((chunk, content_hash))
+    
+    # One summary line per batch rather than a formatted record per skipped chunk
+    if len(pending) < len(chunks):
+        logger.debug(f"Skipping {len(chunks) - len(pending)} chunks that already exist")
+    return pending
+
+
+def build_chunk_row(
+    chunk: Document, content_hash: str, embedding: Sequence[float], model: str, dim: int, ingested_at: datetime
+) -> Dict[str, Any]:
+    """Build the chunks table row for an embedded document chunk"""
+    # Extract title/section from content if available
+    lines = chunk.page_content.strip().split('\n')
+    title = lines[0][:200] if lines else None
+    
+    return {
+        "document_id": stable_document_id(chunk.metadata.get("document_id", "unknown")),
+        "page_start": chunk.metadata.get("page_start"),
+        "page_end": chunk.metadata.get("page_end"),
+        "title": title,
+        "section": chunk.metadata.get("section"),
+        "text": chunk.page_content,
+        "embedding": embedding,
+        "model": model,
+        "dim": dim,
+        "task_type": "RETRIEVAL_DOCUMENT",
+        "sha256": content_hash,
+        "ingested_at": ingested_at
+    }
+
+
+@lru_cache(maxsize=8)
+def _timestamptz_bytes(value: datetime) -> bytes:
+    """Encode a timestamptz as microseconds since 2000-01-01 UTC; cached since a run shares one timestamp"""
+    # Naive values are local time
+    return struct.pack(">q", (value.astimezone(timezone.utc) - _PG_EPOCH) // timedelta(microseconds=1))
+
+
+def _copy_field(value: Any) -> bytes:
+    """Encode a value as a length-prefixed binary COPY field"""
+    if value is None:
+        return _COPY_NULL
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+    elif isinstance(value, int):
+        # document_id, page_start, page_end and dim are all INTEGER columns
+        data = struct.pack(">i", value)
+    elif isinstance(value, datetime):
+        data = _timestamptz_bytes(value)
+    else:
+        # pgvector halfvec binary: dim, unused, then big-endian float16 values (1.5KB vs ~12KB as text)
+        data = HalfVector(value).to_binary()
+    return struct.pack(">i", len(data)) + data
+
+
+def insert_chunk_rows(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Bulk load chunk rows with COPY, falling back to a batched INSERT"""
+    if not rows:
+        return
+    
+    # COPY needs psycopg2's copy_expert; small batches are cheaper as multi-row VALUES
+    if len(rows) < COPY_MIN_ROWS or db.get_bind().dialect.driver != "psycopg2":
+        db.execute(_INSERT_CHUNKS_SQL, rows)
+        return
+    
+    buffer = io.BytesIO()
+    buffer.write(_COPY_BINARY_HEADER)
+    for row in rows:
+        buffer.write(_COPY_FIELD_COUNT)
+        for name in _CHUNK_COLUMNS:
+            buffer.write(_copy_field(row[name]))
+    buffer.write(_COPY_BINARY_TRAILER)
+    buffer.seek(0)
+    
+    # COPY runs on the session's own connection, inside its transaction
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(_COPY_CHUNKS_SQL, buffer)
+    finally:
+        cursor.close()
+
 
 class DocumentIngestion:
     """Handles offline PDF ingestion with Gemini embeddings and pgvector storage"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        chunk_size: int = 900,
+        chunk_overlap: int = 175,
+        embedding_batch_size: int = 100,
+        upsert_batch_size: int = 500,
+        batch_pause_seconds: float = 0.0,
+        skip_failed_batches: bool = False,
+        max_retries: int = 3,
+        backoff_base: float = 10.0
+    ):
         self.settings = get_settings()
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.embedding_batch_size = embedding_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.batch_pause_seconds = batch_pause_seconds
+        self.skip_failed_batches = skip_failed_batches
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        # Built once and reused for every page of every run
+        self._splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+            separators=["\n\n", "\n", " ", ""]
+        )
         self._setup_gemini()
         
     def _setup_gemini(self):
         """Configure Gemini API"""
         genai.configure(api_key=self.settings.GEMINI_API_KEY)
         
-    def _get_embedding(self, text: str) -> List[float]:
-        """Generate embedding using Gemini embedding model"""
-        try:
-            result = genai.embed_content(
-                model=self.settings.EMBEDDING_MODEL,
-                content=text,
-                task_type="RETRIEVAL_DOCUMENT",
-                output_dimensionality=self.settings.EMBEDDING_DIM
-            )
-            return result['embedding']
-        except Exception as e:
-            logger.error(f"Failed to generate embedding: {e}")
-            raise
-            
-    def _load_pdfs(self, data_dir: Path) -> List[Document]:
-        """Load and chunk PDFs from data directory"""
-        documents = []
+    def _get_embeddings_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """Generate embeddings for many texts, keeping up to EMBED_CONCURRENCY batch calls in flight"""
+        batch_size = batch_size or self.embedding_batch_size
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        if len(batches) <= 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            # The calls are network-bound, so threads overlap their round trips; map keeps batch order
+            with ThreadPoolExecutor(max_workers=self.settings.EMBED_CONCURRENCY) as executor:
+                results = list(executor.map(self._embed_batch, batches))
         
-        for pdf_file in data_dir.glob("*.pdf"):
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+    
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """Embed one batch of texts with a single Gemini call, backing off on rate limits"""
+        for attempt in range(self.max_retries):
             try:
-                logger.info(f"Loading {pdf_file.name}...")
-                loader = PyPDFLoader(str(pdf_file))
-                docs = loader.load()
-                
-                # Add metadata
-                for i, doc in enumerate(docs):
-                    doc.metadata.update({
-                        "source": pdf_file.name,
-                        "document_id": pdf_file.stem,
-                        "page": i + 1,
-                        "page_start": i + 1,
-                        "page_end": i + 1,
-                    })
-                
-                documents.extend(docs)
-                logger.info(f"Loaded {len(docs)} pages from {pdf_file.name}")
+                result = genai.embed_content(
+                    model=self.settings.EMBEDDING_MODEL,
+                    content=batch,
+                    task_type="RETRIEVAL_DOCUMENT",
+                    output_dimensionality=self.settings.EMBEDDING_DIM
+                )
+                return result['embedding']
                 
             except Exception as e:
-                logger.warning(f"Failed to load {pdf_file.name}: {e}")
-                
-        return documents
-        
-    def _chunk_documents(self, documents: List[Document]) -> List[Document]:
-        """Split documents into chunks with overlap"""
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=900,
-            chunk_overlap=175,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
-        )
+                error_msg = str(e)
+                if ("429" in error_msg or "quota" in error_msg.lower()) and attempt < self.max_retries - 1:
+                    wait_time = self.backoff_base * (2 ** attempt)  # Exponential backoff: 10s, 20s, 40s, ...
+                    logger.warning(f"Rate limit hit for batch of {len(batch)}, attempt {attempt + 1}. Waiting {wait_time}s...")
+                    time.sleep(wait_time)
+                else:
+                    logger.error(f"Failed to generate embeddings for batch of {len(batch)}: {e}")
+                    raise
+            
+    def _iter_pdf_pages(self, data_dir: Path) -> Iterator[Document]:
+        """Yield PDF pages from data directory, parsing files in parallel worker processes"""
+        pdf_files = sorted(data_dir.glob("*.pdf"))
+        num_workers = min(self.settings.INGEST_WORKERS, len(pdf_files))
         
-        chunks = text_splitter.split_documents(documents)
-        logger.info(f"Created {len(chunks)} chunks from {len(documents)} documents")
+        if num_workers <= 1:
+            for pdf_file in pdf_files:
+                yield from load_single_pdf(pdf_file)
+        else:
+            with multiprocessing.Pool(num_workers) as pool:
+                # imap hands back each file as soon as it is parsed, in file order
+                for docs in pool.imap(load_single_pdf, pdf_files):
+                    yield from docs
         
-        return chunks
+    def _iter_chunks(self, pages: Iterable[Document], stats: Dict[str, int]) -> Iterator[Document]:
+        """Split pages into chunks with overlap one page at a time, counting pages and chunks in stats"""
+        for page in pages:
+            chunks = self._splitter.split_documents([page])
+            stats["documents_loaded"] += 1
+            stats["chunks_created"] += len(chunks)
+            yield from chunks
         
-    def _compute_sha256(self, text: str) -> str:
-        """Compute SHA256 hash of text content"""
-        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+        logger.info(f"Created {stats['chunks_created']} chunks from {stats['documents_loaded']} documents")
         
-    def _upsert_chunks(self, chunks: List[Document]) -> int:
-        """Upsert chunks into pgvector database"""
-        inserted_count = 0
+    def _upsert_chunks(self, chunks: Iterable[Document]) -> int:
+        """Upsert a stream of chunks into pgvector database, committing every upsert_batch_size chunks"""
+        chunk_iter = iter(chunks)
+        total_inserted = 0
+        batch_num = 0
+        index_dropped = False
+        # Every chunk from one run shares a single ingest timestamp
+        ingested_at = datetime.now()
+        start = time.perf_counter()
         
-        with get_database_session() as db:
-            try:
-                for chunk in chunks:
-                    # Generate content hash for deduplication
-                    content_hash = self._compute_sha256(chunk.page_content)
-                    
-                    # Check if chunk already exists
-                    existing = db.execute(
-                        text("SELECT id FROM chunks WHERE sha256 = :hash"),
-                        {"hash": content_hash}
-                    ).fetchone()
-                    
-                    if existing:
-                        logger.debug(f"Chunk with hash {content_hash[:8]} already exists, skipping")
-                        continue
-                        
-                    # Generate embedding
-                    embedding = self._get_embedding(chunk.page_content)
-                    
-                    # Extract title/section from content if available
-                    lines = chunk.page_content.strip().split('\n')
-                    title = lines[0][:200] if lines else None
+        try:
+            # One session and pooled connection for the whole run; transactions end at batch boundaries
+            with get_database_session() as db:
+                # Only one batch of chunks is held in memory at a time
+                while batch := list(islice(chunk_iter, self.upsert_batch_size)):
+                    batch_num += 1
+                    # Pause between batches to stay under the embedding quota
+                    if batch_num > 1 and self.batch_pause_seconds:
+                        time.sleep(self.batch_pause_seconds)
                     
-                    # Insert chunk
-                    db.execute(
-                        text("""
-                            INSERT INTO chunks (
-                                document_id, page_start, page_end, title, section, text, 
-                                embedding, model, dim, task_type, sha256, ingested_at
-                            ) VALUES (
-                                :document_id, :page_start, :page_end, :title, :section, :text,
-                                :embedding, :model, :dim, :task_type, :sha256, :ingested_at
-                            )
-                        """),
-                        {
-                            "document_id": hash(chunk.metadata.get("document_id", "unknown")) % 2147483647,
-                            "page_start": chunk.metadata.get("page_start"),
-                            "page_end": chunk.metadata.get("page_end"),
-                            "title": title,
-                            "section": chunk.metadata.get("section"),
-                            "text": chunk.page_content,
-                            "embedding": embedding,
-                            "model": self.settings.EMBEDDING_MODEL,
-                            "dim": self.settings.EMBEDDING_DIM,
-                            "task_type": "RETRIEVAL_DOCUMENT",
-                            "sha256": content_hash,
-                            "ingested_at": datetime.now()
-                        }
-                    )
-                    inserted_count += 1
+                    # Large loads skip HNSW maintenance per row and build the index once at the end
+                    if not index_dropped and total_inserted >= self.settings.INDEX_REBUILD_MIN_ROWS:
+                        drop_vector_index()
+                        index_dropped = True
                     
-                    if inserted_count % 10 == 0:
-                        logger.info(f"Processed {inserted_count} chunks...")
+                    try:
+                        batch_inserted = self._upsert_batch(db, batch, ingested_at)
+                        db.commit()
+                        total_inserted += batch_inserted
                         
-                db.commit()
-                logger.info(f"Successfully inserted {inserted_count} new chunks")
-                
-            except Exception as e:
-                db.rollback()
-                logger.error(f"Failed to upsert chunks: {e}")
-                raise
-                
-        return inserted_count
+                        # One progress line per batch, never per chunk
+                        elapsed = time.perf_counter() - start
+                        logger.info(
+                            f"Batch {batch_num}: inserted {batch_inserted}/{len(batch)} chunks, "
+                            f"{total_inserted} total ({total_inserted / elapsed:.1f} chunks/s)"
+                        )
+                    except Exception as e:
+                        # Only this batch is uncommitted, so the rollback keeps earlier batches
+                        db.rollback()
+                        logger.error(f"Failed to upsert batch {batch_num}: {e}")
+                        if not self.skip_failed_batches:
+                            raise
+        finally:
+            if index_dropped:
+                logger.info("Rebuilding HNSW index after bulk load...")
+                ensure_chunk_indexes()
+        
+        logger.info(f"Successfully inserted {total_inserted} new chunks")
+        return total_inserted
+    
+    def _upsert_batch(self, db: Session, chunks: List[Document], ingested_at: datetime) -> int:
+        """Dedupe, embed and insert one batch of chunks without committing"""
+        # Generate content hashes and skip chunks that are already stored
+        hashes = [compute_sha256(chunk.page_content) for chunk in chunks]
+        pending = select_new_chunks(db, chunks, hashes)
+        
+        # Embed all new chunks in batched API calls
+        embeddings = self._get_embeddings_batch([chunk.page_content for chunk, _ in pending])
+        
+        # Bulk load all new rows in one statement
+        rows = [
+            build_chunk_row(
+                chunk, content_hash, embedding, self.settings.EMBEDDING_MODEL, self.settings.EMBEDDING_DIM, ingested_at
+            )
+            for (chunk, content_hash), embedding in zip(pending, embeddings)
+        ]
+        insert_chunk_rows(db, rows)
+        return len(rows)
         
     def ingest_documents(self) -> Dict[str, Any]:
         """Main ingestion workflow"""
@@ -174,25 +365,33 @@ class DocumentIngestion:
             if not data_dir.exists():
                 raise FileNotFoundError(f"Data directory not found: {data_dir}")
                 
-            documents = self._load_pdfs(data_dir)
-            if not documents:
-                logger.warning("No documents found to process")
-                return {"status": "no_documents", "processed": 0}
-                
-            # Chunk documents
-            chunks = self._chunk_documents(documents)
+            # Binary COPY writes halfvec, so older float32 vector columns are converted first
+            ensure_halfvec_embedding()
             
-            # Store in database
+            # Stream pages through the splitter into batched upserts
+            stats = {"documents_loaded": 0, "chunks_created": 0}
+            chunks = self._iter_chunks(self._iter_pdf_pages(data_dir), stats)
             inserted_count = self._upsert_chunks(chunks)
             
+            # Retune the HNSW index and search breadth for the new corpus size; rows are already committed
+            try:
+                configure_hnsw_params()
+            except Exception as e:
+                logger.warning(f"Skipping HNSW parameter tuning: {e}")
+            
+            if not stats["documents_loaded"]:
+                logger.warning("No documents found to process")
+                return {"status": "no_documents", "processed": 0}
+            
             duration = (datetime.now() - start_time).total_seconds()
             
             result = {
                 "status": "success",
-                "documents_loaded": len(documents),
-                "chunks_created": len(chunks),
+                "documents_loaded": stats["documents_loaded"],
+                "chunks_created": stats["chunks_created"],
                 "chunks_inserted": inserted_count,
-                "duration_seconds": round(duration, 2)
+                "duration_seconds": round(duration, 2),
+                "success_rate": f"{(inserted_count / stats['chunks_created'] * 100):.1f}%" if stats["chunks_created"] else "0.0%"
             }
             
             logger.info(f"Ingestion completed: {result}")
@@ -0,0 +1,38 @@
+"""
+In-process exact-match cache of review decisions keyed on normalized task details
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from agents.ttl_cache import TTLCache
+from schemas.review import RetrievalReport
+from settings.settings import get_settings
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class ReviewCache(TTLCache[Tuple[Dict[str, Any], RetrievalReport]]):
+    """Thread-safe LRU cache with per-entry expiry for (decision, retrieval report) pairs"""
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 600):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def make_key(details: str) -> str:
+        """Build a cache key from details with case and whitespace differences removed"""
+        normalized = _WHITESPACE_RE.sub(" ", details).strip().lower()
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+_review_cache: Optional[ReviewCache] = None
+
+
+def get_review_cache() -> ReviewCache:
+    """Get the process-wide review cache singleton, sized from settings on first use"""
+    global _review_cache
+    if _review_cache is None:
+        settings = get_settings()
+        _review_cache = ReviewCache(max_size=settings.REVIEW_CACHE_SIZE, ttl_seconds=settings.REVIEW_CACHE_TTL_SECONDS)
+    return _review_cache
@@ -1,54 +1,60 @@
+import asyncio
 import logging
 import time
-from typing import Dict, Any
-from schemas.review import ReviewRequest, ReviewResponse, Decision, Citation, RetrieverResult, DecisionResult
-from agents.retriever_agent import RetrieverAgent
-from agents.decision_agent import DecisionAgent
+from typing import Callable, Dict, Any, List, Set
+from schemas.review import (
+    ReviewRequest, ReviewResponse, DecisionCode, Citation, RetrieverResult, DecisionResult,
+    RetrievalReport, RetrievedPassage
+)
 
 logger = logging.getLogger(__name__)
 
 
-class ReviewRepository:
-    _instance = None
-    _retriever_agent = None
-    _decision_agent = None
+def _validate_approve(decision_result: DecisionResult, cited_tags: Set[str], retriever_result: RetrieverResult) -> None:
+    """Approvals must include multiple distinct citations and sufficient coverage"""
+    if len(cited_tags) < 2:
+        raise ValueError("Approvals must cite at least 2 distinct tags")
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(ReviewRepository, cls).__new__(cls)
-        return cls._instance
+    # Check coverage threshold (using decision agent's threshold)
+    if retriever_result.coverage_score < 0.3:
+        raise ValueError("Approvals must have sufficient coverage score")
+
+
+def _validate_reject(decision_result: DecisionResult, cited_tags: Set[str], retriever_result: RetrieverResult) -> None:
+    """Rejections must include at least one required action"""
+    if not decision_result.required_actions:
+        raise ValueError("Rejections must include at least one required action")
+
+
+# Per-decision rules keyed on the integer code; a code missing here is an invalid decision
+_DECISION_VALIDATORS: Dict[DecisionCode, Callable[[DecisionResult, Set[str], RetrieverResult], None]] = {
+    DecisionCode.APPROVE: _validate_approve,
+    DecisionCode.REJECT: _validate_reject,
+}
+
+
+class ReviewRepository:
+    """Runs a review through the retriever and decision agents"""
     
     def __init__(self):
-        if self._retriever_agent is None:
-            try:
-                self._retriever_agent = RetrieverAgent()
-                logger.info("RetrieverAgent initialized at startup")
-            except Exception as e:
-                logger.error(f"Failed to initialize RetrieverAgent at startup: {str(e)}")
-                self._retriever_agent = None
+        # Agent modules pull in the LLM SDK, numpy and pgvector; import them on first construction,
+        # not when this module is imported
+        from agents.retriever_agent import RetrieverAgent
+        from agents.decision_agent import DecisionAgent
         
-        if self._decision_agent is None:
-            try:
-                self._decision_agent = DecisionAgent()
-                logger.info("DecisionAgent initialized at startup")
-            except Exception as e:
-                logger.error(f"Failed to initialize DecisionAgent at startup: {str(e)}")
-                self._decision_agent = None
+        # Fail fast: a repository without both agents cannot serve any request
+        self._retriever_agent = RetrieverAgent()
+        self._decision_agent = DecisionAgent()
+        logger.info("ReviewRepository agents initialized")
     
     async def process_review(self, request: ReviewRequest) -> ReviewResponse:
         """
         Process a review request using the multi-agent system.
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
-            logger.info(f"Processing review for task_id: {request.task_id}")
-            
-            # Validate agents are initialized
-            if self._retriever_agent is None:
-                raise ValueError("RetrieverAgent not properly initialized")
-            if self._decision_agent is None:
-                raise ValueError("DecisionAgent not properly initialized")
+            logger.info("Processing review for task_id: %s", request.task_id)
             
             # Step 1: Use Retriever Agent to get relevant context
             retrieval_input = {
@@ -56,33 +62,32 @@ class ReviewRepository:
                 "details": request.details
             }
             
-            retriever_result = await self._retriever_agent.process(retrieval_input)
+            retrieval_report = await self._retriever_agent.process(retrieval_input)
+            retriever_result = self._to_retriever_result(retrieval_report)
             
-            # Step 2: Use Decision Agent to make approval/rejection decision
+            # Step 2: Use Decision Agent to make approval/rejection decision.
+            # Citations only depend on retrieval, so they are built while the LLM call is in flight.
             decision_input = {
-                "task_details": request.details,
-                "retriever_result": retriever_result
+                "task_id": request.task_id,
+                "details": request.details,
+                "passages": retrieval_report.passages,
+                "tags": retrieval_report.tags,
+                "coverage": retrieval_report.coverage
             }
             
-            decision_result = await self._decision_agent.process(decision_input)
+            decision_data, citations = await asyncio.gather(
+                self._decision_agent.process(decision_input),
+                asyncio.to_thread(self._build_citations, retriever_result)
+            )
+            decision_result = self._to_decision_result(decision_data)
             
             # Step 3: Validate decision result
             self._validate_decision_result(decision_result, retriever_result)
             
-            # Step 4: Create citations for backward compatibility
-            citations = []
-            for passage in retriever_result.passages:
-                try:
-                    citation = Citation.from_retrieved_passage(passage)
-                    citations.append(citation)
-                except Exception as e:
-                    logger.warning(f"Failed to create citation from passage: {str(e)}")
-                    continue
-            
-            # Step 5: Calculate latency
-            latency_ms = int((time.time() - start_time) * 1000)
+            # Step 4: Calculate latency on the monotonic clock
+            latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             
-            # Step 6: Create response using the factory method
+            # Step 5: Create response using the factory method
             response = ReviewResponse.create_response(
                 task_id=request.task_id,
                 decision_result=decision_result,
@@ -91,48 +96,74 @@ class ReviewRepository:
                 citations=citations
             )
             
-            logger.info(f"Review processed successfully for task_id: {request.task_id} in {latency_ms}ms")
+            logger.info("Review processed successfully for task_id: %s in %dms", request.task_id, latency_ms)
             return response
             
         except Exception as e:
             logger.error(f"Error processing review: {str(e)}")
             raise
     
+    @staticmethod
+    def _to_retriever_result(report: RetrievalReport) -> RetrieverResult:
+        """Pair each retrieved passage with its tag and the document id the tag names"""
+        # Tags are "doc:<document_id>#chunk:<id>" and the report is already validated, so skip re-validation
+        passages = [
+            RetrievedPassage.model_construct(content=content, tag=tag, document_id=tag.split("#", 1)[0][len("doc:"):])
+            for content, tag in zip(report.passages, report.tags)
+        ]
+        return RetrieverResult.model_construct(
+            passages=passages,
+            document_ids=[str(doc_id) for doc_id in report.doc_ids],
+            coverage_score=report.coverage,
+            analysis_summary=None
+        )
+    
+    @staticmethod
+    def _to_decision_result(decision_data: Dict[str, Any]) -> DecisionResult:
+        """Validate the decision agent's dict into a DecisionResult"""
+        return DecisionResult(
+            decision=decision_data["decision"],
+            rationale=decision_data["rationale"],
+            cited_tags=decision_data.get("citations", []),
+            required_actions=decision_data.get("required_actions", []),
+            confidence=decision_data.get("confidence", 0.0)
+        )
+    
+    def _build_citations(self, retriever_result: RetrieverResult) -> List[Citation]:
+        """Create citations for backward compatibility"""
+        # Passages are already validated and conversion skips re-validation, so one guard covers the batch
+        try:
+            return [Citation.from_retrieved_passage(passage) for passage in retriever_result.passages]
+        except Exception as e:
+            logger.warning(f"Failed to create citations from passages: {str(e)}")
+            return []
+    
     def _validate_decision_result(self, decision_result: DecisionResult, retriever_result: RetrieverResult) -> None:
         """
         Validate decision result according to specification requirements
         """
         try:
-            # Validate decision is one of allowed values
-            if decision_result.decision not in [Decision.APPROVE, Decision.REJECT, Decision.REJECT_DUE_TO_INSUFFICIENT_CONTEXT]:
+            # One lookup both checks the decision is allowed and picks its rules
+            validate_decision = _DECISION_VALIDATORS.get(decision_result.code)
+            if validate_decision is None:
                 raise ValueError(f"Invalid decision: {decision_result.decision}")
             
             # Validate confidence is within range
-            if not (0.0 <= decision_result.confidence <= 1.0):
-                raise ValueError(f"Invalid confidence: {decision_result.confidence}")
+            confidence = decision_result.confidence
+            if not (0.0 <= confidence <= 1.0):
+                raise ValueError(f"Invalid confidence: {confidence}")
             
             # Get available tags from retriever result
-            available_tags = set(passage.tag for passage in retriever_result.passages)
+            available_tags = {passage.tag for passage in retriever_result.passages}
             cited_tags = set(decision_result.cited_tags)
             
-            # Validate all citations are subset of retriever's tags
-            if not cited_tags.issubset(available_tags):
-                invalid_tags = cited_tags - available_tags
+            # Validate all citations are subset of retriever's tags; one pass gives test and diagnostic
+            invalid_tags = cited_tags.difference(available_tags)
+            if invalid_tags:
                 raise ValueError(f"Invalid cited tags not from retriever: {invalid_tags}")
             
-            # For approvals, must include multiple distinct citations and sufficient coverage
-            if decision_result.decision == Decision.APPROVE:
-                if len(decision_result.cited_tags) < 2:
-                    raise ValueError("Approvals must cite at least 2 distinct tags")
-                
-                # Check coverage threshold (using decision agent's threshold)
-                if retriever_result.coverage_score < 0.3:
-                    raise ValueError("Approvals must have sufficient coverage score")
-            
-            # For rejections, must include at least one required action
-            if decision_result.decision == Decision.REJECT and not decision_result.required_actions:
-                raise ValueError("Rejections must include at least one required action")
+            validate_decision(decision_result, cited_tags, retriever_result)
             
         except Exception as e:
             logger.error(f"Decision validation failed: {str(e)}")
-            raise
\ No newline at end of file
+            raise
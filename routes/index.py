@@ -1,39 +1,55 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
 from fastapi import APIRouter, HTTPException
 from sqlalchemy import text
 
-from database.connection import get_database_session
+from agents.embedding_cache import get_embedding_cache
+from agents.semantic_cache import get_semantic_cache
+from database.connection import get_async_database_session
+from rag.review_cache import get_review_cache
 from settings.settings import get_settings
 
 router = APIRouter()
 
+# Health check statement is built once per process rather than per probe
+_CHUNK_COUNT_SQL = text("""
+    SELECT COUNT(*) as chunk_count
+    FROM chunks 
+    WHERE model = :model AND dim = :dim
+""")
+
+# Healthy results are reused for this long, so steady-state probes never reach the database
+HEALTH_CACHE_TTL_SECONDS = 60
+_health_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+
 @router.get("/")
 def root():
     return {"welcome": "Welcome to Automated Task Review API"}
 
 @router.get("/health")
-def health_check():
+async def health_check():
     """Health check that verifies DB connectivity and chunk data integrity"""
+    global _health_cache
+    if _health_cache is not None and _health_cache[0] > time.monotonic():
+        return _health_cache[1]
+    
     try:
         settings = get_settings()
         
-        with get_database_session() as db:
-            # Check DB connectivity
-            db.execute(text("SELECT 1"))
-            
-            # Check chunks table and model/dim consistency
-            result = db.execute(
-                text("""
-                    SELECT COUNT(*) as chunk_count
-                    FROM chunks 
-                    WHERE model = :model AND dim = :dim
-                """),
+        # Runs on the asyncpg pool, so probes never tie up a threadpool worker
+        async with get_async_database_session() as db:
+            # Check chunks table and model/dim consistency; the round trip also proves connectivity
+            result = await db.execute(
+                _CHUNK_COUNT_SQL,
                 {
                     "model": settings.EMBEDDING_MODEL,
                     "dim": settings.EMBEDDING_DIM
                 }
-            ).fetchone()
+            )
+            row = result.fetchone()
             
-            chunk_count = result[0] if result else 0
+            chunk_count = row[0] if row else 0
             
             if chunk_count == 0:
                 raise HTTPException(
@@ -41,14 +57,27 @@ def health_check():
                     detail=f"No chunks found with model={settings.EMBEDDING_MODEL} and dim={settings.EMBEDDING_DIM}"
                 )
             
-            return {
+            health = {
                 "status": "ok",
                 "chunks": chunk_count,
                 "model": settings.EMBEDDING_MODEL,
                 "embedding_dim": settings.EMBEDDING_DIM
             }
+            # Only positive results are cached; failures are re-checked on the next probe
+            _health_cache = (time.monotonic() + HEALTH_CACHE_TTL_SECONDS, health)
+            return health
             
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Health check failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=503, detail=f"Health check failed: {str(e)}")
+
+
+@router.get("/metrics")
+def metrics():
+    """In-process cache metrics"""
+    return {
+        "embedding_cache": get_embedding_cache().stats(),
+        "semantic_cache": get_semantic_cache().stats(),
+        "review_cache": get_review_cache().stats()
+    }
\ No newline at end of file
@@ -1,16 +1,25 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import ValidationError
+from starlette.background import BackgroundTask
 from schemas.review import ReviewRequest
 from rag.orchestrator import RAGOrchestrator
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-orchestrator = RAGOrchestrator()
+
+
+def get_orchestrator(request: Request) -> RAGOrchestrator:
+    """Return the app-scoped orchestrator, creating it if startup has not run"""
+    orchestrator = getattr(request.app.state, "orchestrator", None)
+    if orchestrator is None:
+        orchestrator = request.app.state.orchestrator = RAGOrchestrator()
+    return orchestrator
 
 
 @router.post("/review")
-async def create_review(request: ReviewRequest):
+async def create_review(request: ReviewRequest, orchestrator: RAGOrchestrator = Depends(get_orchestrator)):
     """
     Create a new review task using the RAG orchestrator.
     
@@ -21,14 +30,18 @@ async def create_review(request: ReviewRequest):
     - details: Required string 
     """
     try:
-        logger.info(f"Received review request for task_id: {request.task_id}")
+        logger.info("Received review request for task_id: %s", request.task_id)
         
         # Use orchestrator for complete RAG pipeline
         response = await orchestrator.process_review(request.task_id, request.details)
         
-        logger.info(f"Review completed for task_id: {request.task_id}, decision: {response['data']['decision']}")
-        
-        return response
+        # The envelope is plain JSON types already; returning the response directly skips jsonable_encoder.
+        # The completion log runs as a background task, after the body has been sent.
+        return ORJSONResponse(response, background=BackgroundTask(
+            logger.info,
+            "Review completed for task_id: %s, decision: %s, latency: %sms",
+            request.task_id, response['data']['decision'], response['data']['latency_ms']
+        ))
     
     except ValidationError as e:
         logger.warning(f"Validation error for review request: {str(e)}")
@@ -1,53 +1,114 @@
-from pydantic import BaseModel, Field, validator
-from enum import Enum
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from enum import Enum, IntEnum
+from functools import cached_property
+from collections import deque
 from datetime import datetime, timezone
-from typing import List, Optional, Dict, Any
-import uuid
+from typing import List, Optional, Dict, Any, Tuple
+import os
+import time
 import re
 
+# Compiled once at import instead of per validation call
+_HTML_RE = re.compile(r'<[^>]+>')
+
+# Last formatted timestamp and the epoch second it belongs to; requests in the same second share it
+_timestamp_cache: Tuple[int, str] = (-1, "")
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time as 'YYYY-MM-DD HH:MM:SS UTC', formatted at most once per second"""
+    global _timestamp_cache
+    second = int(time.time())
+    cached_second, formatted = _timestamp_cache
+    if cached_second != second:
+        now = datetime.fromtimestamp(second, timezone.utc)
+        formatted = f"{now.year:04d}-{now.month:02d}-{now.day:02d} {now.hour:02d}:{now.minute:02d}:{now.second:02d} UTC"
+        _timestamp_cache = (second, formatted)
+    return formatted
+
+
+# Response ids are drawn from a pool filled by one urandom call per batch of ids
+_UUID_POOL_SIZE = 1024
+_uuid_pool: "deque[str]" = deque()
+
+# A forked worker must not hand out the ids its parent already drew
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_uuid_pool.clear)
+
+
+def _refill_uuid_pool() -> None:
+    """Generate a batch of random (version 4) UUID strings from one block of OS randomness"""
+    block = os.urandom(16 * _UUID_POOL_SIZE)
+    ids = []
+    for offset in range(0, len(block), 16):
+        value = int.from_bytes(block[offset:offset + 16], "big")
+        # Set the RFC 4122 variant and version 4 bits, as uuid.uuid4() does
+        value = (value & ~(0xc000 << 48) | (0x8000 << 48)) & ~(0xf000 << 64) | (4 << 76)
+        ids.append("%08x-%04x-%04x-%04x-%012x" % (
+            value >> 96, (value >> 80) & 0xffff, (value >> 64) & 0xffff, (value >> 48) & 0xffff, value & 0xffffffffffff
+        ))
+    _uuid_pool.extend(ids)
+
+
+def _next_uuid() -> str:
+    """Next random UUID string from the pool, refilling it when empty"""
+    while True:
+        try:
+            return _uuid_pool.popleft()
+        except IndexError:
+            _refill_uuid_pool()
+
 
 class Decision(str, Enum):
     APPROVE = "approve"
     REJECT = "reject"
 
 
+class DecisionCode(IntEnum):
+    """Integer mirror of Decision for internal branching; the string enum stays at the API boundary"""
+    APPROVE = 0
+    REJECT = 1
+
+
+_DECISION_CODES = {Decision.APPROVE: DecisionCode.APPROVE, Decision.REJECT: DecisionCode.REJECT}
+
+
 class ReviewRequest(BaseModel):
+    # Stripping and length limits run in pydantic-core before the Python validators
+    model_config = ConfigDict(str_strip_whitespace=True, frozen=True)
+    
     task_id: str = Field(
         ..., 
         min_length=1, 
         max_length=255,
-        strip_whitespace=True,
         description="Unique identifier for the task"
     )
     details: str = Field(
         ..., 
         min_length=1, 
         max_length=10000,
-        strip_whitespace=True,
         description="Task details for review"
     )
     
-    @validator('task_id')
+    @field_validator('task_id', mode='after')
+    @classmethod
     def validate_task_id(cls, v):
         if not v or v.isspace():
             raise ValueError('task_id cannot be empty or whitespace')
-        # Check for HTML/binary content
-        if re.search(r'<[^>]+>', v) or any(ord(c) > 127 for c in v if not c.isascii()):
+        # Check for HTML/binary content; isascii is a single flag check on the string
+        if not v.isascii() or _HTML_RE.search(v):
             raise ValueError('task_id cannot contain HTML or binary data')
         return v
     
-    @validator('details')
+    @field_validator('details', mode='after')
+    @classmethod
     def validate_details(cls, v):
         if not v or v.isspace():
             raise ValueError('details cannot be empty or whitespace')
         # Check for HTML/binary content
-        if re.search(r'<[^>]+>', v):
+        if _HTML_RE.search(v):
             raise ValueError('details cannot contain HTML content')
-        # Ensure UTF-8 compatibility
-        try:
-            v.encode('utf-8')
-        except UnicodeEncodeError:
-            raise ValueError('details must be valid UTF-8')
+        # No UTF-8 re-encode needed: pydantic's core str validation already rejects lone surrogates
         return v
 
 
@@ -88,6 +149,11 @@ class DecisionResult(BaseModel):
     required_actions: List[RequiredAction] = Field(default_factory=list, description="Actions needed for rejected tasks")
     confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence level in the decision")
 
+    @cached_property
+    def code(self) -> Optional[DecisionCode]:
+        """Integer code of the decision, resolved once per result; None for an unknown decision"""
+        return _DECISION_CODES.get(self.decision)
+
 
 class Citation(BaseModel):
     document_name: str = Field(..., description="Name of the source document")
@@ -102,7 +168,8 @@ class Citation(BaseModel):
         # Properly truncate excerpt to 500 characters max
         excerpt = passage.content[:497] + "..." if len(passage.content) > 500 else passage.content
         
-        return cls(
+        # Fields come from an already-validated passage, so skip re-validation
+        return cls.model_construct(
             document_name=document_name or passage.document_id,
             page_number=page_number,
             relevance_score=0.8,  # Default relevance score
@@ -138,13 +205,12 @@ class ReviewResponse(BaseModel):
         latency_ms: int,
         citations: List[Citation] = None
     ):
-        import uuid
-        
-        return cls(
-            uuid=str(uuid.uuid4()),  # Generate UUID for backward compatibility
+        # Every field comes from already-validated results, so skip re-validation
+        return cls.model_construct(
+            uuid=_next_uuid(),  # Generate UUID for backward compatibility
             task_id=task_id,
             decision=decision_result.decision,
-            timestamp=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
+            timestamp=_utc_timestamp(),
             rationale=decision_result.rationale,
             cited_tags=decision_result.cited_tags,
             required_actions=decision_result.required_actions,
@@ -0,0 +1,27 @@
+"""
+Application logging setup: request-path records are queued and written by a background thread
+"""
+
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+def configure_logging(level: int = logging.INFO) -> QueueListener:
+    """Route root logging through an in-memory queue and start the thread that writes it out"""
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    # The request path only enqueues; formatting and stream I/O happen on the listener thread
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -1,4 +1,5 @@
 from dotenv import load_dotenv
+from functools import lru_cache
 import os
 
 load_dotenv()
@@ -15,10 +16,37 @@ class Settings:
     COVERAGE_THRESHOLD: float = float(os.getenv("COVERAGE_THRESHOLD", "0.35"))
     APPROVAL_COVERAGE_MIN: float = float(os.getenv("APPROVAL_COVERAGE_MIN", "0.45"))
     MAX_CONTEXT_CHARS: int = int(os.getenv("MAX_CONTEXT_CHARS", "5000"))
+    MIN_PASSAGES: int = int(os.getenv("MIN_PASSAGES", "2"))
+    MIN_DETAILS_LEN: int = int(os.getenv("MIN_DETAILS_LEN", "10"))
+    QUANTIZED_SEARCH: bool = os.getenv("QUANTIZED_SEARCH", "false").lower() == "true"
+    QUANTIZED_RERANK_FACTOR: int = int(os.getenv("QUANTIZED_RERANK_FACTOR", "4"))
+    
+    # Decision Batching Configuration
+    DECISION_BATCHING: bool = os.getenv("DECISION_BATCHING", "false").lower() == "true"
+    DECISION_BATCH_MAX: int = int(os.getenv("DECISION_BATCH_MAX", "8"))
+    DECISION_BATCH_WINDOW_MS: float = float(os.getenv("DECISION_BATCH_WINDOW_MS", "25"))
+    
+    # Embedding Cache Configuration
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "2000"))
+    EMBEDDING_CACHE_TTL_SECONDS: int = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "600"))
+    SEMANTIC_CACHE_SIZE: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "1000"))
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    SEMANTIC_CACHE_TTL_SECONDS: int = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "600"))
+    REVIEW_CACHE_SIZE: int = int(os.getenv("REVIEW_CACHE_SIZE", "10000"))
+    REVIEW_CACHE_TTL_SECONDS: int = int(os.getenv("REVIEW_CACHE_TTL_SECONDS", "600"))
+    
+    # Ingestion Configuration
+    EMBED_CONCURRENCY: int = int(os.getenv("EMBED_CONCURRENCY", "8"))
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", str(min(os.cpu_count() or 1, 4))))
+    INDEX_REBUILD_MIN_ROWS: int = int(os.getenv("INDEX_REBUILD_MIN_ROWS", "500"))
     
     # Database Configuration
     DATABASE_URL: str = os.getenv("DATABASE_URL")
     
+    # Startup Configuration
+    WARMUP_ON_STARTUP: bool = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+    WARMUP_TIMEOUT_SECONDS: float = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "10"))
+    
     def __init__(self):
         # Fail fast validation
         if not self.GEMINI_API_KEY:
@@ -35,8 +63,7 @@ class Settings:
             raise ValueError("gemini-embedding-001 requires EMBEDDING_DIM=768")
 
 
-def get_settings():
+@lru_cache
+def get_settings() -> Settings:
     """Get settings singleton"""
-    if not hasattr(get_settings, "_settings"):
-        get_settings._settings = Settings()
-    return get_settings._settings
\ No newline at end of file
+    return Settings()
\ No newline at end of file
@@ -0,0 +1,20 @@
+"""
+Request bodies shared across the API tests, built once at import
+"""
+
+# Plain dicts because httpx cannot JSON-encode a MappingProxyType; tests must not mutate them
+
+# Each fails ReviewRequest validation: missing task_id, missing details, empty task_id, empty details
+INVALID_REVIEWS = (
+    {"details": "test"},
+    {"task_id": "test-001"},
+    {"task_id": "", "details": "test"},
+    {"task_id": "test-001", "details": ""},
+)
+
+XSS_REVIEW = {"task_id": "xss-test", "details": "<script>alert('xss')</script>implement dashboard"}
+
+FORMAT_REVIEW = {
+    "task_id": "format-test",
+    "details": "implement secure authentication system with multi-factor authentication"
+}
@@ -0,0 +1,62 @@
+"""
+Shared fixtures for the API tests
+"""
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+
+from main import app
+from rag.orchestrator import RAGOrchestrator
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-integration", action="store_true", default=False,
+        help="run tests that call the live LLM + pgvector pipeline"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip integration-marked tests unless --run-integration is given"""
+    if config.getoption("--run-integration"):
+        return
+    skip_integration = pytest.mark.skip(reason="needs --run-integration")
+    for item in items:
+        if "integration" in item.keywords:
+            item.add_marker(skip_integration)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Synchronous test client for the FastAPI app, shared by the whole session"""
+    # Unhandled server errors come back as 500s, which the status-only tests already accept
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def aclient():
+    """In-process async client for the FastAPI app, shared by the whole session"""
+    async with AsyncClient(transport=ASGITransport(app=app, raise_app_exceptions=False), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def orchestrator():
+    """RAGOrchestrator built once for tests that only need a constructed instance"""
+    return RAGOrchestrator()
+
+
+@pytest.fixture(scope="session")
+def backend_alive(client):
+    """Probe /health once per session instead of letting every integration test find out on its own"""
+    return client.get("/health").status_code == 200
+
+
+@pytest.fixture(autouse=True)
+def _skip_integration_without_backend(request):
+    """Skip integration tests up front, without a request, once the backend probe has failed"""
+    if request.node.get_closest_marker("integration") and not request.getfixturevalue("backend_alive"):
+        pytest.skip("Backend not available: /health probe failed")
+
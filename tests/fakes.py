@@ -0,0 +1,19 @@
+"""
+Lightweight stand-ins for the Gemini SDK objects the agents call
+"""
+
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, List
+
+
+@dataclass
+class FakeLLM:
+    """GenerativeModel double that returns a fixed response text and records each prompt"""
+
+    text: str
+    prompts: List[str] = field(default_factory=list)
+
+    def generate_content(self, prompt: str, **kwargs: Any) -> SimpleNamespace:
+        self.prompts.append(prompt)
+        return SimpleNamespace(text=self.text)
@@ -0,0 +1,146 @@
+"""
+Unit tests for DecisionAgent response parsing and validation
+"""
+
+import asyncio
+
+import orjson
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from agents.batching_decision_agent import BatchingDecisionAgent
+from agents.decision_agent import DecisionAgent
+from fakes import FakeLLM
+
+
+class TestDecisionAgent:
+    """Test DecisionAgent against a mocked LLM call"""
+
+    @pytest.fixture
+    def decision_agent(self):
+        return DecisionAgent()
+
+    @pytest.fixture
+    def decision_input(self):
+        return {
+            "details": "Deploy hotfix to production",
+            "passages": [
+                "Production deploys require an approved change ticket.",
+                "Hotfixes must be reviewed by the on-call owner."
+            ],
+            "tags": ["doc:1#chunk:1", "doc:1#chunk:2"],
+            "coverage": 0.8
+        }
+
+    @pytest.mark.asyncio
+    async def test_valid_json_is_parsed(self, decision_input):
+        """Test that structured JSON output is parsed into a decision"""
+        llm = FakeLLM('{"decision": "approve", "rationale": "Complies per doc:1#chunk:1", '
+                      '"citations": ["doc:1#chunk:1"], "confidence": 0.9, "required_actions": []}')
+
+        result = await DecisionAgent(model=llm).process(decision_input)
+
+        assert result["decision"] == "approve"
+        assert result["citations"] == ["doc:1#chunk:1"]
+        assert result["confidence"] == 0.9
+        assert "doc:1#chunk:2" in llm.prompts[0]
+
+    @pytest.mark.asyncio
+    async def test_invalid_json_returns_reject(self, decision_input):
+        """Test that unparseable output falls back to the standard reject response"""
+        agent = DecisionAgent(model=FakeLLM("not json"))
+
+        result = await agent.process(decision_input)
+
+        assert result == agent._create_reject_response()
+
+    @pytest.mark.asyncio
+    async def test_low_coverage_skips_llm(self, decision_input):
+        """Test that insufficient retrieval rejects without calling the LLM"""
+        decision_input["coverage"] = 0.1
+        llm = FakeLLM("{}")
+
+        result = await DecisionAgent(model=llm).process(decision_input)
+
+        assert llm.prompts == []
+        assert result["decision"] == "reject"
+
+    def test_citations_filtered_and_deduplicated(self, decision_agent):
+        """Test that unknown and repeated citations are dropped in order"""
+        decision_data = {
+            "decision": "reject",
+            "rationale": "Missing ticket",
+            "citations": ["doc:1#chunk:2", "doc:9#chunk:9", "doc:1#chunk:1", "doc:1#chunk:2"],
+            "confidence": 0.7
+        }
+
+        result = decision_agent._validate_and_filter_decision(
+            decision_data, ["doc:1#chunk:1", "doc:1#chunk:2"]
+        )
+
+        assert result["citations"] == ["doc:1#chunk:2", "doc:1#chunk:1"]
+
+    def test_context_truncated_to_max_chars(self, decision_agent):
+        """Test that the budgeted context matches joining then slicing"""
+        passages = ["a" * 3000, "b" * 4000, "c" * 5000]
+
+        context = decision_agent._build_context(passages)
+
+        assert context == "\n\n".join(passages)[:decision_agent.settings.MAX_CONTEXT_CHARS]
+
+    @pytest.mark.asyncio
+    async def test_warm_builds_client_once(self, decision_agent):
+        """Test that warm builds the Gemini client on the first call only"""
+        with patch('agents.decision_agent.warm_generative_client') as mock_warm:
+            await decision_agent.warm()
+            await decision_agent.warm()
+
+            mock_warm.assert_called_once()
+
+
+class TestBatchingDecisionAgent:
+    """Test BatchingDecisionAgent request coalescing against a mocked LLM"""
+
+    @pytest.fixture
+    def batching_agent(self):
+        return BatchingDecisionAgent(max_batch=8, window_ms=20)
+
+    def _input(self, i):
+        return {
+            "details": f"Deploy service {i} to production",
+            "passages": ["Deploys need a change ticket.", "Hotfixes need on-call review."],
+            "tags": [f"doc:{i}#chunk:1", f"doc:{i}#chunk:2"],
+            "coverage": 0.8
+        }
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_llm_call(self, batching_agent):
+        """Test that requests arriving together are decided by a single batched call"""
+        raw = orjson.dumps([
+            {"index": i, "decision": "approve", "rationale": f"ok {i}",
+             "citations": [f"doc:{i}#chunk:1", "doc:9#chunk:9"], "confidence": 0.9}
+            for i in reversed(range(3))
+        ]).decode()
+        with patch.object(batching_agent, '_batch_model') as mock_model, \
+             patch.object(batching_agent, '_generate_decision', new=AsyncMock()) as mock_single:
+            mock_model.generate_content.return_value = MagicMock(text=raw)
+
+            results = await asyncio.gather(*(batching_agent.process(self._input(i)) for i in range(3)))
+
+            mock_model.generate_content.assert_called_once()
+            mock_single.assert_not_called()
+            assert [r["rationale"] for r in results] == ["ok 0", "ok 1", "ok 2"]
+            assert results[1]["citations"] == ["doc:1#chunk:1"]
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_falls_back_to_single_calls(self, batching_agent):
+        """Test that a failed batched call is retried per task"""
+        raw = '{"decision": "reject", "rationale": "Missing ticket", "citations": [], "confidence": 0.6}'
+        with patch.object(batching_agent, '_batch_model') as mock_model, \
+             patch.object(batching_agent, '_generate_decision', new=AsyncMock(return_value=raw)) as mock_single:
+            mock_model.generate_content.side_effect = Exception("quota exceeded")
+
+            results = await asyncio.gather(*(batching_agent.process(self._input(i)) for i in range(2)))
+
+            assert mock_single.call_count == 2
+            assert all(r["rationale"] == "Missing ticket" for r in results)
@@ -0,0 +1,155 @@
+"""
+Unit tests for DocumentIngestion chunk upserts
+"""
+
+import struct
+import zlib
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from langchain.schema import Document
+
+from rag.ingest import DocumentIngestion, _copy_field, compute_sha256, stable_document_id
+
+
+class TestDocumentIngestion:
+    """Test DocumentIngestion against mocked embedding and database layers"""
+
+    @pytest.fixture
+    def ingestion(self):
+        return DocumentIngestion()
+
+    @pytest.fixture
+    def chunks(self):
+        return [
+            Document(page_content=f"Policy section {i}\nBody text {i}", metadata={"document_id": "policy"})
+            for i in range(5)
+        ]
+
+    def test_embeddings_requested_in_batches(self, ingestion, chunks):
+        """Test that new chunks are embedded with one API call per batch"""
+        with patch('rag.ingest.get_database_session') as mock_session, \
+             patch('rag.ingest.genai.embed_content') as mock_embed:
+            mock_db = MagicMock()
+            mock_session.return_value.__enter__.return_value = mock_db
+            mock_db.execute.return_value.fetchone.return_value = None
+            mock_embed.side_effect = lambda content, **kwargs: {'embedding': [[0.1] * 768 for _ in content]}
+
+            embeddings = ingestion._get_embeddings_batch([c.page_content for c in chunks], batch_size=2)
+
+            assert mock_embed.call_count == 3
+            assert sorted(len(call.kwargs["content"]) for call in mock_embed.call_args_list) == [1, 2, 2]
+            assert len(embeddings) == 5
+
+    def test_upsert_embeds_one_call_per_hundred_chunks(self, ingestion):
+        """Test that an upsert batch is embedded with ceil(new chunks / 100) API calls"""
+        chunks = [Document(page_content=f"Chunk {i}", metadata={"document_id": "policy"}) for i in range(250)]
+        with patch('rag.ingest.get_database_session') as mock_session, \
+             patch('rag.ingest.genai.embed_content') as mock_embed:
+            mock_db = MagicMock()
+            mock_session.return_value.__enter__.return_value = mock_db
+            mock_db.execute.return_value = []
+            mock_embed.side_effect = lambda content, **kwargs: {'embedding': [[0.1] * 768 for _ in content]}
+
+            inserted = ingestion._upsert_chunks(chunks)
+
+            assert inserted == 250
+            assert mock_embed.call_count == 3
+
+    def test_concurrent_batches_keep_input_order(self, ingestion):
+        """Test that embeddings from concurrent batch calls line up with their texts"""
+        texts = [str(i) for i in range(7)]
+        with patch('rag.ingest.genai.embed_content') as mock_embed:
+            mock_embed.side_effect = lambda content, **kwargs: {'embedding': [[float(t)] for t in content]}
+
+            embeddings = ingestion._get_embeddings_batch(texts, batch_size=2)
+
+            assert embeddings == [[float(t)] for t in texts]
+
+    def test_duplicate_chunks_skipped(self, ingestion, chunks):
+        """Test that repeated chunk text is embedded and inserted once"""
+        with patch('rag.ingest.get_database_session') as mock_session, \
+             patch('rag.ingest.genai.embed_content') as mock_embed:
+            mock_db = MagicMock()
+            mock_session.return_value.__enter__.return_value = mock_db
+            mock_db.execute.return_value.fetchone.return_value = None
+            mock_embed.side_effect = lambda content, **kwargs: {'embedding': [[0.1] * 768 for _ in content]}
+
+            inserted = ingestion._upsert_chunks(chunks + chunks[:2])
+
+            assert inserted == 5
+            assert mock_embed.call_count == 1
+            assert len(mock_embed.call_args.kwargs["content"]) == 5
+
+    def test_copy_field_binary_encoding(self):
+        """Test binary COPY encoding of nulls, integers, text and halfvec embeddings"""
+        assert _copy_field(None) == b"\xff\xff\xff\xff"
+        assert _copy_field(7) == b"\x00\x00\x00\x04\x00\x00\x00\x07"
+        assert _copy_field("a\tb") == b"\x00\x00\x00\x03a\tb"
+        assert _copy_field([0.5, 1.0]) == (
+            b"\x00\x00\x00\x08" + struct.pack(">HH", 2, 0) + struct.pack(">2e", 0.5, 1.0)
+        )
+
+    def test_rate_limited_batch_retried_with_backoff(self, ingestion):
+        """Test that a 429 response is retried after an exponential backoff"""
+        with patch('rag.ingest.genai.embed_content') as mock_embed, \
+             patch('rag.ingest.time.sleep') as mock_sleep:
+            mock_embed.side_effect = [Exception("429 quota exceeded"), {'embedding': [[0.1]]}]
+
+            embeddings = ingestion._embed_batch(["text"])
+
+            assert embeddings == [[0.1]]
+            mock_sleep.assert_called_once_with(ingestion.backoff_base)
+
+    def test_failed_upsert_batch_skipped(self, chunks):
+        """Test that batched upserts keep going after one batch fails"""
+        ingestion = DocumentIngestion(upsert_batch_size=2, skip_failed_batches=True)
+        with patch('rag.ingest.get_database_session'), \
+             patch.object(ingestion, '_upsert_batch', side_effect=[2, Exception("boom"), 1]):
+            inserted = ingestion._upsert_chunks(chunks)
+
+            assert inserted == 3
+
+    def test_document_id_stable_across_runs(self):
+        """Test that document ids do not depend on the interpreter's hash seed"""
+        assert stable_document_id("security-policy") == zlib.crc32(b"security-policy") % 2147483647
+        assert 0 <= stable_document_id("unknown") < 2147483647
+
+    def test_chunk_stream_upserted_in_bounded_batches(self, chunks):
+        """Test that a chunk generator is consumed one upsert batch at a time"""
+        ingestion = DocumentIngestion(upsert_batch_size=2)
+        with patch('rag.ingest.get_database_session'), \
+             patch.object(ingestion, '_upsert_batch', side_effect=lambda db, batch, ingested_at: len(batch)) as mock_upsert:
+            inserted = ingestion._upsert_chunks(chunk for chunk in chunks)
+
+            assert inserted == 5
+            assert [len(call.args[1]) for call in mock_upsert.call_args_list] == [2, 2, 1]
+
+    def test_stored_hashes_never_embedded(self, ingestion, chunks):
+        """Test that chunks whose hash is already in the database skip the embedding API"""
+        stored = compute_sha256(chunks[0].page_content)
+        with patch('rag.ingest.get_database_session') as mock_session, \
+             patch('rag.ingest.genai.embed_content') as mock_embed:
+            mock_db = MagicMock()
+            mock_session.return_value.__enter__.return_value = mock_db
+            mock_db.execute.return_value = [(stored,)]
+            mock_embed.side_effect = lambda content, **kwargs: {'embedding': [[0.1] * 768 for _ in content]}
+
+            inserted = ingestion._upsert_chunks(chunks + chunks[:1])
+
+            assert inserted == 4
+            assert chunks[0].page_content not in mock_embed.call_args.kwargs["content"]
+
+    def test_hnsw_index_rebuilt_after_large_load(self, chunks):
+        """Test that the HNSW index is dropped once past the threshold and rebuilt at the end"""
+        ingestion = DocumentIngestion(upsert_batch_size=2)
+        with patch('rag.ingest.get_database_session'), \
+             patch('rag.ingest.drop_vector_index') as mock_drop, \
+             patch('rag.ingest.ensure_chunk_indexes') as mock_rebuild, \
+             patch.object(ingestion.settings, 'INDEX_REBUILD_MIN_ROWS', 2), \
+             patch.object(ingestion, '_upsert_batch', side_effect=lambda db, batch, ingested_at: len(batch)):
+            ingestion._upsert_chunks(chunks)
+
+            mock_drop.assert_called_once()
+            mock_rebuild.assert_called_once()
@@ -0,0 +1,284 @@
+"""
+RAG review API tests using an in-process httpx AsyncClient
+Tests the complete RAG pipeline end-to-end with simplified approach
+"""
+
+import asyncio
+from typing import List, Literal
+
+import pytest
+from pydantic import BaseModel, Field
+from unittest.mock import AsyncMock
+
+from _payloads import FORMAT_REVIEW, INVALID_REVIEWS, XSS_REVIEW
+from main import app
+from rag.orchestrator import RAGOrchestrator
+from routes.review import get_orchestrator
+from schemas.common import Envelope
+from schemas.review import RequiredAction, RetrievalReport
+
+
+class _ReviewData(BaseModel):
+    """Shape of the data field in a /review response"""
+    task_id: str
+    decision: Literal["approve", "reject"]
+    rationale: str
+    citations: List[str]
+    retrieved_doc_ids: List[int]
+    coverage: float = Field(..., ge=0.0, le=1.0)
+    latency_ms: int = Field(..., ge=0)
+    required_actions: List[RequiredAction]
+    confidence: float = Field(..., ge=0.0, le=1.0)
+
+
+class TestReviewAPI:
+    """End-to-end tests for the review and health endpoints"""
+    
+    @pytest.mark.integration
+    async def test_review_endpoint_responds(self, aclient):
+        """Test that review endpoint responds (basic connectivity)"""
+        response = await aclient.post("/review", json={
+            "task_id": "minimal-001",
+            "details": "create basic user interface"
+        })
+        
+        # Should not return 404 (endpoint exists)
+        assert response.status_code != 404
+        
+        # If system is working, should return 200 or 500 (not 422 validation error)
+        assert response.status_code in [200, 500]
+    
+    async def test_request_validation_works(self, aclient):
+        """Test request validation catches invalid inputs"""
+        # Independent requests, so send them concurrently
+        responses = await asyncio.gather(*(aclient.post("/review", json=payload) for payload in INVALID_REVIEWS))
+        
+        for payload, response in zip(INVALID_REVIEWS, responses):
+            assert response.status_code == 422, f"Expected 422 for {payload}"
+    
+    async def test_html_injection_blocked(self, aclient):
+        """Test HTML injection protection"""
+        response = await aclient.post("/review", json=XSS_REVIEW)
+        
+        # Should be blocked with validation error
+        assert response.status_code == 422
+        messages = " ".join(error.get("msg", "") for error in response.json()["detail"])
+        assert "HTML" in messages or "content" in messages
+    
+    async def test_health_endpoint(self, aclient):
+        """Test health endpoint exists and responds"""
+        response = await aclient.get("/health")
+        
+        # Should not return 404
+        assert response.status_code != 404
+        
+        # Should return either success or service unavailable 
+        assert response.status_code in [200, 503]
+        
+        if response.status_code == 200:
+            data = response.json()
+            assert "status" in data
+            assert data["status"] == "ok"
+    
+    async def test_metrics_caches_sized_from_settings(self, aclient, monkeypatch):
+        """Test that /metrics hit before any agent exists still builds the caches from settings"""
+        import agents.embedding_cache as embedding_cache
+        import agents.semantic_cache as semantic_cache
+        import rag.review_cache as review_cache
+        from settings.settings import get_settings
+        
+        settings = get_settings()
+        monkeypatch.setattr(settings, "EMBEDDING_CACHE_SIZE", 11)
+        monkeypatch.setattr(settings, "SEMANTIC_CACHE_SIZE", 12)
+        monkeypatch.setattr(settings, "REVIEW_CACHE_SIZE", 13)
+        monkeypatch.setattr(embedding_cache, "_embedding_cache", None)
+        monkeypatch.setattr(semantic_cache, "_semantic_cache", None)
+        monkeypatch.setattr(review_cache, "_review_cache", None)
+        
+        response = await aclient.get("/metrics")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["embedding_cache"]["max_size"] == 11
+        assert data["semantic_cache"]["max_size"] == 12
+        assert data["review_cache"]["max_size"] == 13
+    
+    @pytest.mark.integration
+    async def test_response_format_if_available(self, aclient):
+        """Test response format when system is available"""
+        response = await aclient.post("/review", json=FORMAT_REVIEW)
+        
+        # Skip test if system unavailable
+        if response.status_code != 200:
+            pytest.skip("System not available for full testing")
+        
+        # One validated parse covers field presence, types and ranges
+        envelope = Envelope[_ReviewData].model_validate(response.json())
+        assert envelope.message == "review completed"
+        assert envelope.data.task_id == FORMAT_REVIEW["task_id"]
+        assert envelope.data.latency_ms > 0
+    
+    @pytest.mark.integration
+    @pytest.mark.parametrize("task_id,details", [
+        ("simple-task", "create form"),
+        ("security-task", "implement comprehensive security authentication system with multi-factor authentication, encryption, and audit logging"),
+        ("ai-task", "develop artificial intelligence system for automated decision making with machine learning algorithms and data processing")
+    ], ids=["simple", "complex", "ai-related"])
+    async def test_different_task_types(self, aclient, task_id, details):
+        """Test that each type of task gets a valid review"""
+        response = await aclient.post("/review", json={"task_id": task_id, "details": details})
+        
+        if response.status_code != 200:
+            pytest.skip(f"System not available: {response.status_code}")
+        
+        data = response.json()["data"]
+        
+        # Outcomes depend on the ingested docs, so only the shape of the decision is checked
+        assert data["decision"] in ["approve", "reject"]
+        assert 0.0 <= data["coverage"] <= 1.0
+    
+    @pytest.mark.integration
+    @pytest.mark.parametrize("name,details", [
+        ("basic", "create login"),
+        ("detailed", "implement user authentication system"),
+        ("comprehensive", "implement secure user authentication system with multi-factor authentication following security best practices and compliance requirements")
+    ], ids=["basic", "detailed", "comprehensive"])
+    async def test_coverage_calculation_working(self, aclient, name, details):
+        """Test that coverage calculation produces reasonable values"""
+        response = await aclient.post("/review", json={"task_id": f"coverage-{name}", "details": details})
+        
+        if response.status_code != 200:
+            pytest.skip(f"System not available: {response.status_code}")
+        
+        coverage = response.json()["data"]["coverage"]
+        assert 0.0 <= coverage <= 1.0, f"Invalid coverage for {name}: {coverage}"
+
+
+class TestReviewPlumbing:
+    """Test /review request handling against stubbed agents, so no LLM or database is needed"""
+    
+    @pytest.fixture
+    def stub_orchestrator(self):
+        """Serve /review from an orchestrator whose retriever and decision agent are stubs"""
+        orchestrator = RAGOrchestrator()
+        orchestrator.retriever.process = AsyncMock(return_value=RetrievalReport(
+            passages=["Deploys need a change ticket.", "Hotfixes need on-call review."],
+            tags=["doc:1#chunk:1", "doc:1#chunk:2"],
+            doc_ids=[1],
+            coverage=0.8
+        ))
+        orchestrator.decision_agent.warm = AsyncMock()
+        orchestrator.decision_agent.process = AsyncMock(return_value={
+            "decision": "approve",
+            "rationale": "Complies per doc:1#chunk:1 and doc:1#chunk:2",
+            "citations": ["doc:1#chunk:1", "doc:1#chunk:2"],
+            "confidence": 0.9,
+            "required_actions": []
+        })
+        app.dependency_overrides[get_orchestrator] = lambda: orchestrator
+        yield orchestrator
+        app.dependency_overrides.pop(get_orchestrator, None)
+    
+    async def test_review_envelope_from_stubbed_pipeline(self, aclient, stub_orchestrator):
+        """Test that a review passes through retrieval, decision and policy gate into the envelope"""
+        response = await aclient.post("/review", json={
+            "task_id": "plumbing-001",
+            "details": "plumbing check: deploy hotfix to production"
+        })
+        
+        assert response.status_code == 200
+        envelope = Envelope[_ReviewData].model_validate(response.json())
+        assert envelope.message == "review completed"
+        assert envelope.data.task_id == "plumbing-001"
+        assert envelope.data.decision == "approve"
+        assert envelope.data.citations == ["doc:1#chunk:1", "doc:1#chunk:2"]
+        assert envelope.data.retrieved_doc_ids == [1]
+        stub_orchestrator.decision_agent.process.assert_awaited_once()
+    
+    async def test_low_coverage_rejected_without_decision(self, aclient, stub_orchestrator):
+        """Test that low retrieval coverage rejects before the decision agent is called"""
+        stub_orchestrator.retriever.process.return_value = RetrievalReport(
+            passages=["Unrelated text."], tags=["doc:2#chunk:9"], doc_ids=[2], coverage=0.1
+        )
+        
+        response = await aclient.post("/review", json={
+            "task_id": "plumbing-002",
+            "details": "plumbing check: unrelated low coverage task"
+        })
+        
+        assert response.status_code == 200
+        assert response.json()["data"]["decision"] == "reject"
+        stub_orchestrator.decision_agent.process.assert_not_awaited()
+
+
+class TestSystemIntegration:
+    """Integration tests for system components"""
+    
+    def test_can_import_main_components(self):
+        """Test that main components can be imported"""
+        from main import app
+        from rag.orchestrator import RAGOrchestrator
+        from agents.retriever_agent import RetrieverAgent
+        from agents.decision_agent import DecisionAgent
+        from schemas.review import ReviewRequest, RetrievalReport
+        
+        # Should not raise import errors
+        assert app is not None
+        assert RAGOrchestrator is not None
+        assert RetrieverAgent is not None
+        assert DecisionAgent is not None
+    
+    def test_import_reads_no_settings(self):
+        """Test that importing the app works without GEMINI_API_KEY, so settings are only read at construction"""
+        import os
+        import subprocess
+        import sys
+        
+        env = {key: value for key, value in os.environ.items() if key != "GEMINI_API_KEY"}
+        result = subprocess.run(
+            [sys.executable, "-c", "import agents.retriever_agent, main"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env=env, capture_output=True, text=True
+        )
+        
+        assert result.returncode == 0, result.stderr
+    
+    def test_settings_configuration(self):
+        """Test settings are properly configured"""
+        from settings.settings import get_settings
+        
+        settings = get_settings()
+        
+        # Should have required models configured
+        assert hasattr(settings, 'LLM_MODEL')
+        assert hasattr(settings, 'EMBEDDING_MODEL') 
+        assert hasattr(settings, 'EMBEDDING_DIM')
+        assert hasattr(settings, 'TOP_K')
+        assert hasattr(settings, 'COVERAGE_THRESHOLD')
+        assert hasattr(settings, 'APPROVAL_COVERAGE_MIN')
+        
+        # Check values are reasonable
+        assert settings.EMBEDDING_DIM == 768
+        assert settings.TOP_K == 4
+        assert 0.0 <= settings.COVERAGE_THRESHOLD <= 1.0
+        assert 0.0 <= settings.APPROVAL_COVERAGE_MIN <= 1.0
+    
+    def test_orchestrator_can_be_created(self, orchestrator):
+        """Test that orchestrator can be created without errors"""
+        assert orchestrator is not None
+        assert orchestrator.retriever is not None
+        assert orchestrator.decision_agent is not None
+    
+    def test_agents_implement_agent_protocol(self, orchestrator):
+        """Test that every agent provides process and get_agent_type"""
+        from agents.base_agent import Agent
+        
+        assert isinstance(orchestrator.retriever, Agent)
+        assert isinstance(orchestrator.decision_agent, Agent)
+
+
+# Test runner for direct execution
+if __name__ == "__main__":
+    import sys
+    
+    # Run in-process rather than re-importing the app in a pytest subprocess
+    sys.exit(pytest.main([__file__, "-v", "-s", "--tb=short"]))
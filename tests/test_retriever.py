@@ -0,0 +1,152 @@
+"""
+Unit tests for RetrieverAgent result post-processing
+"""
+
+import pytest
+import numpy as np
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from agents.retriever_agent import RetrieverAgent
+from schemas.review import RetrievalReport
+
+# One shared query embedding; the retriever copies it into float32 arrays and never mutates it
+_FAKE_EMBEDDING = [0.1] * 768
+
+# Immutable, so every test can share the same rows
+_MOCK_DB_RESULTS = (
+    (1, 10, "Sample text content 1", 0.85),
+    (2, 10, "Sample text content 2", 0.78),
+    (3, 11, "Sample text content 3", 0.65),
+    (4, 11, "Sample text content 4", 0.60),
+)
+
+
+class TestRetrieverAgent:
+    """Test RetrieverAgent against mocked embedding and database layers"""
+
+    @pytest.fixture
+    def retriever(self):
+        agent = RetrieverAgent()
+        agent.semantic_cache.clear()
+        return agent
+
+    @pytest.fixture
+    def patched_retriever(self, retriever):
+        """Retriever with a fixed query embedding and a mocked session; set_results sets the returned rows"""
+        with patch('agents.retriever_agent.get_async_database_session') as mock_session, \
+             patch.object(retriever, '_get_embedding', return_value=_FAKE_EMBEDDING):
+            mock_db = MagicMock()
+            mock_session.return_value.__aenter__.return_value = mock_db
+            mock_db.execute = AsyncMock(return_value=MagicMock())
+
+            def set_results(rows):
+                mock_db.execute.return_value.fetchall.return_value = rows
+
+            yield retriever, set_results
+
+    @pytest.mark.asyncio
+    async def test_process_happy_path(self, patched_retriever):
+        """Test the report structure, coverage and tag format from a single process call"""
+        retriever, set_results = patched_retriever
+        set_results(_MOCK_DB_RESULTS)
+
+        result = await retriever.process({"details": "test"})
+
+        assert isinstance(result, RetrievalReport)
+        assert len(result.passages) == len(result.tags) == 4
+        assert result.tags == [
+            "doc:10#chunk:1", "doc:10#chunk:2", "doc:11#chunk:3", "doc:11#chunk:4"
+        ]
+        assert result.doc_ids == [10, 11]
+        assert result.coverage == round((0.85 + 0.78 + 0.65 + 0.60) / 4, 3)
+
+    @pytest.mark.asyncio
+    async def test_passages_trimmed_to_1500_chars(self, patched_retriever):
+        """Test that long passages are trimmed"""
+        long_text = "x" * 3000
+        retriever, set_results = patched_retriever
+        set_results(((1, 10, long_text, 0.85),))
+
+        result = await retriever.process({"details": "test"})
+
+        assert len(result.passages[0]) == 1500
+
+    @pytest.mark.asyncio
+    async def test_query_failure_returns_empty_report(self, retriever):
+        """Test that a database error yields an empty zero-coverage report"""
+        with patch('agents.retriever_agent.get_async_database_session') as mock_session, \
+             patch.object(retriever, '_get_embedding', return_value=_FAKE_EMBEDDING):
+            mock_session.side_effect = Exception("connection refused")
+
+            result = await retriever.process({"details": "test"})
+
+            assert result.passages == []
+            assert result.tags == []
+            assert result.coverage == 0.0
+
+    @pytest.mark.asyncio
+    async def test_batch_process_fans_out_results(self, retriever):
+        """Test that batch rows are split back into one report per input"""
+        batch_rows = [
+            (0, 1, 10, "Sample text content 1", 0.9),
+            (0, 2, 10, "Sample text content 2", 0.7),
+            (2, 3, 11, "Sample text content 3", 0.6),
+        ]
+        with patch('agents.retriever_agent.get_async_database_session') as mock_session, \
+             patch.object(retriever, '_get_embeddings_batch', return_value=[[0.1] * 768, [0.2] * 768]):
+            mock_db = MagicMock()
+            mock_session.return_value.__aenter__.return_value = mock_db
+            mock_db.execute = AsyncMock(return_value=MagicMock())
+            mock_db.execute.return_value.fetchall.return_value = batch_rows
+
+            results = await retriever.batch_process([
+                {"details": "first"}, {"details": ""}, {"details": "third"}
+            ])
+
+            assert len(results) == 3
+            assert results[0].tags == ["doc:10#chunk:1", "doc:10#chunk:2"]
+            assert results[0].coverage == 0.8
+            assert results[1].passages == []
+            assert results[2].tags == ["doc:11#chunk:3"]
+
+    def test_embedding_returned_as_float32(self, retriever):
+        """Test that query embeddings are converted to float32 arrays once"""
+        with patch('agents.retriever_agent.genai.embed_content', return_value={'embedding': _FAKE_EMBEDDING}):
+            embedding = retriever._get_embedding("float32 embedding check")
+
+            assert isinstance(embedding, np.ndarray)
+            assert embedding.dtype == np.float32
+            assert embedding.shape == (768,)
+
+    def test_repeated_query_embedded_once(self, retriever):
+        """Test that a second identical query is served from the embedding cache"""
+        retriever.embedding_cache.clear()
+        with patch('agents.retriever_agent.genai.embed_content', return_value={'embedding': _FAKE_EMBEDDING}) as mock_embed:
+            first = retriever._get_embedding("security review task")
+            mock_embed.reset_mock()
+            second = retriever._get_embedding("security review task")
+
+            assert mock_embed.call_count == 0
+            assert np.array_equal(first, second)
+
+    def test_doc_ids_deduplicated_in_first_seen_order(self, retriever):
+        """Test that interleaved document IDs are deduplicated in rank order"""
+        rows = [
+            (1, 11, "a", 0.9),
+            (2, 10, "b", 0.8),
+            (3, 11, "c", 0.7),
+            (4, 10, "d", 0.6),
+        ]
+
+        report = retriever._build_report(rows)
+
+        assert report.doc_ids == [11, 10]
+
+    def test_negative_similarity_clamped_to_zero_coverage(self, retriever):
+        """Test that coverage stays within the RetrievalReport bounds without validation"""
+        rows = [(1, 10, "a", -0.2), (2, 10, "b", -0.1)]
+
+        report = retriever._build_report(rows)
+
+        assert report.coverage == 0.0
+        assert report.passages == ["a", "b"]
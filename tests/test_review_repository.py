@@ -0,0 +1,143 @@
+"""
+Tests for ReviewRepository against stubbed retriever and decision agents
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from repositories.review_repository import ReviewRepository
+from schemas.review import (
+    Decision, DecisionCode, DecisionResult, RequiredAction, RetrievalReport, RetrievedPassage, RetrieverResult,
+    ReviewRequest
+)
+
+
+class TestReviewRepository:
+    """Test ReviewRepository wiring between the agents and ReviewResponse"""
+
+    @pytest.fixture
+    def repository(self):
+        repository = ReviewRepository()
+        repository._retriever_agent.process = AsyncMock(return_value=RetrievalReport(
+            passages=["Deploys need a change ticket.", "Hotfixes need on-call review."],
+            tags=["doc:1#chunk:1", "doc:2#chunk:7"],
+            doc_ids=[1, 2],
+            coverage=0.8
+        ))
+        repository._decision_agent.process = AsyncMock(return_value={
+            "decision": "approve",
+            "rationale": "Complies per doc:1#chunk:1 and doc:2#chunk:7",
+            "citations": ["doc:1#chunk:1", "doc:2#chunk:7"],
+            "confidence": 0.9,
+            "required_actions": []
+        })
+        return repository
+
+    @pytest.mark.asyncio
+    async def test_process_review_builds_response(self, repository):
+        """Test that agent outputs are carried into the ReviewResponse"""
+        request = ReviewRequest(task_id="repo-001", details="deploy hotfix to production")
+
+        response = await repository.process_review(request)
+
+        assert response.task_id == "repo-001"
+        assert response.decision == Decision.APPROVE
+        assert response.cited_tags == ["doc:1#chunk:1", "doc:2#chunk:7"]
+        assert response.document_ids == ["1", "2"]
+        assert response.coverage_score == 0.8
+        assert [citation.tag for citation in response.citations] == ["doc:1#chunk:1", "doc:2#chunk:7"]
+        assert [citation.document_name for citation in response.citations] == ["1", "2"]
+
+    @pytest.mark.asyncio
+    async def test_decision_agent_gets_retrieval_fields(self, repository):
+        """Test that the decision agent receives details, passages, tags and coverage"""
+        request = ReviewRequest(task_id="repo-002", details="deploy hotfix to production")
+
+        await repository.process_review(request)
+
+        decision_input = repository._decision_agent.process.await_args.args[0]
+        assert decision_input["details"] == "deploy hotfix to production"
+        assert decision_input["passages"] == ["Deploys need a change ticket.", "Hotfixes need on-call review."]
+        assert decision_input["tags"] == ["doc:1#chunk:1", "doc:2#chunk:7"]
+        assert decision_input["coverage"] == 0.8
+
+
+class TestDecisionValidation:
+    """Test the per-decision rules dispatched on DecisionResult.code"""
+
+    @pytest.fixture
+    def repository(self):
+        return ReviewRepository()
+
+    @pytest.fixture
+    def retriever_result(self):
+        return RetrieverResult(
+            passages=[
+                RetrievedPassage(content="Policy A", tag="doc:1#chunk:1", document_id="1"),
+                RetrievedPassage(content="Policy B", tag="doc:2#chunk:7", document_id="2"),
+            ],
+            document_ids=["1", "2"],
+            coverage_score=0.8
+        )
+
+    def test_approve_with_two_citations_passes(self, repository, retriever_result):
+        """Test that an approval citing two distinct retrieved tags is accepted"""
+        decision = DecisionResult(
+            decision="approve", rationale="ok", cited_tags=["doc:1#chunk:1", "doc:2#chunk:7"], confidence=0.9
+        )
+
+        assert decision.code is DecisionCode.APPROVE
+        repository._validate_decision_result(decision, retriever_result)
+
+    def test_approve_with_one_citation_rejected(self, repository, retriever_result):
+        """Test that the APPROVE rules require two distinct citations"""
+        decision = DecisionResult(decision="approve", rationale="ok", cited_tags=["doc:1#chunk:1"], confidence=0.9)
+
+        with pytest.raises(ValueError, match="at least 2 distinct tags"):
+            repository._validate_decision_result(decision, retriever_result)
+
+    def test_approve_with_low_coverage_rejected(self, repository, retriever_result):
+        """Test that the APPROVE rules require sufficient coverage"""
+        retriever_result.coverage_score = 0.1
+        decision = DecisionResult(
+            decision="approve", rationale="ok", cited_tags=["doc:1#chunk:1", "doc:2#chunk:7"], confidence=0.9
+        )
+
+        with pytest.raises(ValueError, match="sufficient coverage"):
+            repository._validate_decision_result(decision, retriever_result)
+
+    def test_reject_requires_an_action(self, repository, retriever_result):
+        """Test that the REJECT rules require at least one required action"""
+        decision = DecisionResult(decision="reject", rationale="no", confidence=0.5)
+
+        assert decision.code is DecisionCode.REJECT
+        with pytest.raises(ValueError, match="required action"):
+            repository._validate_decision_result(decision, retriever_result)
+
+    def test_reject_with_action_passes(self, repository, retriever_result):
+        """Test that a rejection with a required action is accepted"""
+        decision = DecisionResult(
+            decision="reject", rationale="no", confidence=0.5,
+            required_actions=[RequiredAction(action="add_ticket", description="Attach a change ticket")]
+        )
+
+        repository._validate_decision_result(decision, retriever_result)
+
+    def test_unknown_decision_code_rejected(self, repository, retriever_result):
+        """Test that a decision with no DecisionCode has no rules and is invalid"""
+        decision = DecisionResult.model_construct(
+            decision="escalate", rationale="?", cited_tags=[], required_actions=[], confidence=0.5
+        )
+
+        assert decision.code is None
+        with pytest.raises(ValueError, match="Invalid decision"):
+            repository._validate_decision_result(decision, retriever_result)
+
+    def test_citation_outside_retrieval_rejected(self, repository, retriever_result):
+        """Test that cited tags must come from the retrieved passages"""
+        decision = DecisionResult(
+            decision="approve", rationale="ok", cited_tags=["doc:1#chunk:1", "doc:9#chunk:9"], confidence=0.9
+        )
+
+        with pytest.raises(ValueError, match="not from retriever"):
+            repository._validate_decision_result(decision, retriever_result)
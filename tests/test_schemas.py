@@ -0,0 +1,75 @@
+"""
+Tests for the response helpers in schemas.review
+"""
+
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import patch
+
+from schemas.review import _next_uuid, _utc_timestamp
+
+
+class TestUtcTimestamp:
+    """Test the once-per-second UTC timestamp formatter"""
+
+    def test_format_matches_current_utc_second(self):
+        """Test that the timestamp is 'YYYY-MM-DD HH:MM:SS UTC' for the current second"""
+        with patch('schemas.review.time.time', return_value=1_700_000_000.25):
+            assert _utc_timestamp() == "2023-11-14 22:13:20 UTC"
+
+    def test_new_second_reformatted(self):
+        """Test that the cached string is reused within a second and replaced on the next"""
+        with patch('schemas.review.time.time', side_effect=[1_700_000_001.1, 1_700_000_001.9, 1_700_000_002.0]):
+            first = _utc_timestamp()
+            second = _utc_timestamp()
+            third = _utc_timestamp()
+
+        assert first is second
+        assert third == "2023-11-14 22:13:22 UTC"
+
+    def test_agrees_with_datetime(self):
+        """Test that the real clock formats the same as datetime.strftime"""
+        before = datetime.now(timezone.utc).replace(microsecond=0)
+        stamp = _utc_timestamp()
+        after = datetime.now(timezone.utc).replace(microsecond=0)
+
+        assert re.fullmatch(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} UTC", stamp)
+        assert stamp in {before.strftime("%Y-%m-%d %H:%M:%S UTC"), after.strftime("%Y-%m-%d %H:%M:%S UTC")}
+
+
+class TestNextUuid:
+    """Test the pooled random UUID generator"""
+
+    def test_ids_are_version_4_rfc4122(self):
+        """Test that every pooled id parses as an RFC 4122 version 4 UUID"""
+        # More than one pool's worth, so a refill is covered
+        ids = [_next_uuid() for _ in range(1500)]
+
+        for value in ids:
+            parsed = uuid.UUID(value)
+            assert parsed.version == 4
+            assert parsed.variant == uuid.RFC_4122
+            assert str(parsed) == value
+        assert len(set(ids)) == len(ids)
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+    def test_forked_child_draws_fresh_ids(self):
+        """Test that a child forked after a refill does not repeat the parent's next ids"""
+        _next_uuid()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            os.write(write_fd, _next_uuid().encode())
+            os._exit(0)
+
+        os.close(write_fd)
+        child_id = os.read(read_fd, 64).decode()
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+
+        assert child_id != _next_uuid()